@@ -0,0 +1,309 @@
+# archive.py
+"""Monthly columnar archive of old sessions, plus one query API over it and the store.
+
+Sessions older than `keep_days` move out of sessions.db into
+archive/YYYY-MM.npz (one NumPy array per column) and their date sheets
+are dropped from log.xlsx. Rows keep where they were recorded (station,
+station_seq; "" and 0 for this station), so sync.py can still export this
+station's archived sessions and a merged session is archived once.
+archive/manifest.json lists every partition
+with its day range and per-student / per-bike totals, so
+
+- query() opens only the partitions whose month overlaps the date range
+  and that contain the student asked for, and
+- all-time leaderboard totals come from the manifest without reading a row.
+
+    python archive.py compact [--keep-days 60]
+    python archive.py export out.xlsx [--from 2025-01-01] [--to 2025-03-31]
+"""
+import json
+import os
+import threading
+from datetime import date, timedelta
+import numpy as np
+from session_store import write_log_xlsx, trim_xlsx
+
+ARCHIVE_DIR = "archive"
+
+# store row layout: id, day, student, cycle, start_ts, end_ts, duration, avg_power, energy_kwh,
+# then (SessionStore.sessions(origin=True)) station, station_seq
+COLUMNS = ["id", "day", "student", "cycle", "start_ts", "end_ts", "duration", "avg_power", "energy_kwh",
+           "station", "station_seq"]
+TEXT_COLUMNS = ("day", "student", "cycle", "station")
+INT_COLUMNS = ("id", "station_seq")
+
+
+def _columns(rows):
+    cols = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+    out = {}
+    for name, values in zip(COLUMNS, cols):
+        if name in TEXT_COLUMNS:
+            out[name] = np.array(["" if v is None else v for v in values], dtype=str)
+        elif name in INT_COLUMNS:
+            out[name] = np.array([0 if v is None else v for v in values], dtype=np.int64)
+        else:
+            out[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return out
+
+
+def _rows(cols, mask=None):
+    if mask is not None:
+        cols = {k: v[mask] for k, v in cols.items()}
+    avg = [None if np.isnan(v) else v for v in cols['avg_power'].tolist()]
+    return list(zip(cols['id'].tolist(), cols['day'].tolist(), cols['student'].tolist(),
+                    cols['cycle'].tolist(), cols['start_ts'].tolist(), cols['end_ts'].tolist(),
+                    cols['duration'].tolist(), avg, cols['energy_kwh'].tolist()))
+
+
+def _totals(keys, kwh):
+    out = {}
+    for key, k in zip(keys.tolist(), kwh.tolist()):
+        tot = out.setdefault(key, [0.0, 0])
+        tot[0] += k
+        tot[1] += 1
+    return out
+
+
+class SessionArchive:
+    """The archive partitions of one SessionStore, and queries across both.
+
+    Everything from days before the store's 'archived_before' mark is in the
+    archive, everything from that day on is in the store, so every session
+    is read from exactly one place. compact() holds `lock` while it moves
+    rows; readers that need a consistent view across both take it too.
+    """
+
+    def __init__(self, store, directory=ARCHIVE_DIR):
+        self.store = store
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._cache = {}   # month -> (mtime_ns, columns)
+        self._manifest = (None, {'partitions': {}})
+
+    @property
+    def cutoff(self):
+        """First day still kept in the store (None: nothing archived yet)."""
+        return self.store.get_meta("archived_before")
+
+    def manifest(self):
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+            if mtime != self._manifest[0]:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = (mtime, json.load(f))
+        except (OSError, ValueError):
+            pass
+        return self._manifest[1]
+
+    def _path(self, month):
+        return os.path.join(self.directory, f"{month}.npz")
+
+    def load(self, month):
+        """All columns of one monthly partition (cached until it is rewritten)."""
+        path = self._path(month)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._cache.get(month)
+        if cached is None or cached[0] != mtime:
+            with np.load(path) as npz:
+                cols = {k: npz[k] for k in COLUMNS if k in npz.files}
+            n = len(cols['id'])
+            # partitions written before station was kept: all recorded here
+            cols.setdefault('station', np.full(n, "", dtype=str))
+            cols.setdefault('station_seq', np.zeros(n, dtype=np.int64))
+            cached = self._cache[month] = (mtime, cols)
+        return cached[1]
+
+    # --- compaction ---------------------------------------------------------
+
+    def compact(self, keep_days=60, xlsx_path=None, xlsx_lock=None, today=None):
+        """Move sessions older than `keep_days` into the archive; returns how many."""
+        before = ((today or date.today()) - timedelta(days=keep_days)).isoformat()
+        moved = 0
+        with self.lock:
+            if (self.cutoff or "") < before:
+                rows = self.store.sessions(last_day=(date.fromisoformat(before) - timedelta(days=1)).isoformat(),
+                                           origin=True)
+                if rows:
+                    self._write(rows)
+                moved = self.store.delete_before(before)
+        # opening log.xlsx is slow, so only once per new cutoff
+        if xlsx_path and self.store.get_meta("xlsx_trimmed_before") != before:
+            try:
+                with xlsx_lock or threading.Lock():
+                    trimmed = trim_xlsx(xlsx_path, before)
+                self.store.set_meta("xlsx_trimmed_before", before)
+                if trimmed:
+                    print(f"Archived {trimmed} old day sheet(s) out of {xlsx_path}")
+            except PermissionError:
+                print(f"[WARN] {xlsx_path} is open; old day sheets will be trimmed next time")
+        return moved
+
+    def archive_stragglers(self):
+        """Move store rows from before the cutoff (e.g. merged from another station)
+        into the archive, where queries look for them; returns how many."""
+        with self.lock:
+            cutoff = self.cutoff
+            if cutoff is None:
+                return 0
+            rows = self.store.sessions(last_day=(date.fromisoformat(cutoff) - timedelta(days=1)).isoformat(),
+                                       origin=True)
+            if not rows:
+                return 0
+            self._write(rows)
+            return self.store.delete_before(cutoff)
+
+    def _write(self, rows):
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = json.loads(json.dumps(self.manifest()))  # private copy to update
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row[1][:7], []).append(row)
+        for month, new in sorted(by_month.items()):
+            cols = _columns(new)
+            if os.path.exists(self._path(month)):
+                old = self.load(month)
+                # a crash between writing and deleting can leave rows in both
+                keep = ~np.isin(old['id'], cols['id'])
+                # a merged session imported again (new id) is already here
+                merged = old['station'] != ""
+                seen = set(zip(old['station'][merged & keep].tolist(), old['station_seq'][merged & keep].tolist()))
+                new = np.array([(s, q) not in seen for s, q in
+                                zip(cols['station'].tolist(), cols['station_seq'].tolist())], dtype=bool)
+                cols = {k: np.concatenate([old[k][keep], cols[k][new]]) for k in COLUMNS}
+            order = np.argsort(cols['start_ts'], kind="stable")
+            cols = {k: v[order] for k, v in cols.items()}
+            tmp = self._path(month) + ".tmp.npz"
+            np.savez_compressed(tmp, **cols)
+            os.replace(tmp, self._path(month))
+            local = cols['id'][cols['station'] == ""]
+            manifest['partitions'][month] = {
+                'rows': int(len(cols['id'])),
+                'last_local_id': int(local.max()) if len(local) else 0,
+                'first_day': str(cols['day'][0]),   # rows are in start order
+                'last_day': str(cols['day'][-1]),
+                'students': _totals(cols['student'], cols['energy_kwh']),
+                'bikes': _totals(cols['cycle'], cols['energy_kwh']),
+            }
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    def start_compaction(self, keep_days, xlsx_path=None, xlsx_lock=None):
+        """Run compact() on a background thread (it is cheap when there is nothing to move)."""
+        def job():
+            try:
+                n = self.compact(keep_days, xlsx_path, xlsx_lock)
+                if n:
+                    print(f"Archived {n} session(s) older than {keep_days} days")
+            except Exception as e:
+                print(f"[ERROR] Archive compaction failed: {e}")
+        thread = threading.Thread(target=job, name="archive", daemon=True)
+        thread.start()
+        return thread
+
+    # --- queries ------------------------------------------------------------
+
+    def partitions(self, first_day=None, last_day=None, student=None, below=None):
+        """Months of the partitions that can hold matching sessions (partition pruning)."""
+        months = []
+        for month, part in sorted(self.manifest()['partitions'].items()):
+            if first_day is not None and part['last_day'] < first_day:
+                continue
+            if last_day is not None and part['first_day'] > last_day:
+                continue
+            if below is not None and part['first_day'] >= below:
+                continue
+            if student is not None and student not in part['students']:
+                continue
+            months.append(month)
+        return months
+
+    def query_archive(self, first_day=None, last_day=None, student=None, below=None):
+        """Archived sessions matching the filters (days before `below`, if given)."""
+        rows = []
+        for month in self.partitions(first_day, last_day, student, below):
+            cols = self.load(month)
+            mask = np.ones(len(cols['id']), dtype=bool)
+            if first_day is not None:
+                mask &= cols['day'] >= first_day
+            if last_day is not None:
+                mask &= cols['day'] <= last_day
+            if below is not None:
+                mask &= cols['day'] < below
+            if student is not None:
+                mask &= cols['student'] == student
+            rows.extend(_rows(cols, mask))
+        return rows
+
+    def query(self, first_day=None, last_day=None, student=None):
+        """Sessions in [first_day, last_day] (inclusive, optional) for one student
+        (optional), from the archive and the store; oldest first.
+
+        Rows have the SessionStore.sessions() layout. Only partitions that can
+        match are opened, and the store part is one indexed SELECT.
+        """
+        with self.lock:
+            cutoff = self.cutoff
+            rows = []
+            if cutoff is not None and (first_day is None or first_day < cutoff):
+                rows = self.query_archive(first_day, last_day, student, below=cutoff)
+            if last_day is None or cutoff is None or last_day >= cutoff:
+                lo = first_day if cutoff is None or (first_day or "") >= cutoff else cutoff
+                rows += self.store.sessions(first_day=lo, last_day=last_day, student=student)
+        return rows
+
+    def local_sessions(self, since_id=0, limit=None):
+        """Archived sessions recorded at this station with id > since_id, oldest
+        first (SessionStore.local_sessions() for the archive)."""
+        rows = []
+        for month, part in sorted(self.manifest()['partitions'].items()):
+            if limit == 0:
+                break
+            if part.get('last_local_id', since_id + 1) <= since_id:
+                continue
+            cols = self.load(month)
+            rows.extend(_rows(cols, (cols['station'] == "") & (cols['id'] > since_id)))
+        rows.sort()
+        return rows if limit is None else rows[:limit]
+
+    def summaries(self):
+        """[(per-student totals, per-bike totals)] of every partition, from the manifest."""
+        return [(p['students'], p['bikes']) for p in self.manifest()['partitions'].values()]
+
+    def export_xlsx(self, path="log.xlsx", first_day=None, last_day=None):
+        """log.xlsx layout (one sheet per day) for a date range, archive included."""
+        by_day = {}
+        for row in self.query(first_day, last_day):
+            by_day.setdefault(row[1], []).append(row)
+        return write_log_xlsx(path, sorted(by_day.items()))
+
+
+def main():
+    import argparse
+    from session_store import SessionStore
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compact", help="move old sessions into the archive")
+    c.add_argument("--keep-days", type=int, default=60)
+    c.add_argument("--xlsx", default="log.xlsx", help="log.xlsx to trim old day sheets from")
+    e = sub.add_parser("export", help="write a log.xlsx-style workbook for a date range")
+    e.add_argument("out")
+    e.add_argument("--from", dest="first_day")
+    e.add_argument("--to", dest="last_day")
+    args = ap.parse_args()
+
+    store = SessionStore()
+    archive = SessionArchive(store)
+    if args.cmd == "compact":
+        n = archive.compact(args.keep_days, args.xlsx)
+        print(f"Archived {n} session(s); {len(archive.manifest()['partitions'])} partition(s)")
+    else:
+        n = archive.export_xlsx(args.out, args.first_day, args.last_day)
+        print(f"Exported {n} day sheet(s) to {args.out}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
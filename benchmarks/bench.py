@@ -0,0 +1,216 @@
+# benchmarks/bench.py
+"""Headless benchmarks for the ingest, session-stop, leaderboard and live-table paths.
+
+    python benchmarks/bench.py                     # quick sizes, JSON to stdout
+    python benchmarks/bench.py --full --out bench.json
+
+Every run works in a throw-away directory, so the real sessions.db /
+log.xlsx are never touched. Results are JSON: one entry per measurement
+with its parameters, so runs can be diffed to spot regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+
+def timed(fn, repeat):
+    """Run fn() `repeat` times; return per-call seconds (sorted)."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return sorted(samples)
+
+
+def summary(samples):
+    n = len(samples)
+    return {
+        'n': n,
+        'mean_ms': sum(samples) / n * 1000,
+        'p50_ms': samples[n // 2] * 1000,
+        'p95_ms': samples[min(n - 1, int(n * 0.95))] * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+def write_settings(boards, bikes):
+    conf = {
+        'boards': [{'id': f"B{b + 1}", 'url': "http://127.0.0.1:9/", 'channels': bikes}
+                   for b in range(boards)],
+        # listen for pushes on a spare port, so no real board is contacted
+        'transport': 'udp', 'push_host': '127.0.0.1', 'push_port': 0,
+        'api_port': 0, 'metrics_port': 0, 'feed_port': 0,
+    }
+    with open("settings.json", "w", encoding="utf-8") as f:
+        json.dump(conf, f)
+
+
+def make_app(boards=1, bikes=8):
+    import ui
+    write_settings(boards, bikes)
+    return ui.EnergyApp()
+
+
+def make_engine(boards=1, bikes=8):
+    from engine import TrackerEngine
+    write_settings(boards, bikes)
+    return TrackerEngine()
+
+
+def fake_records(n, students=200, bikes=8, start=None):
+    start = start or time.time() - n * 60
+    return [{
+        'session_id': f"{start}-{i}", 'student': f"Student {i % students}", 'cycle': f"Cycle {i % bikes + 1}",
+        'start': start + i * 60, 'end': start + i * 60 + 45, 'duration': 45.0,
+        'avg_power': 30.0, 'kwh': 0.0004,
+    } for i in range(n)]
+
+
+def bench_ingest(results, bike_counts, rates, frames):
+    for bikes in bike_counts:
+        boards = max(1, bikes // 8)
+        engine = make_engine(boards, min(bikes, 8))
+        keys = list(engine.channel_map)
+        t0 = time.time()
+        payloads = [{'timestamp': t0 + k * 0.05,
+                     'channels': [{'channel': key, 'voltage': 12.0 + (k % 7), 'timestamp': t0 + k * 0.05}
+                                  for key in keys]} for k in range(frames)]
+        it = iter(payloads)
+        samples = timed(lambda: engine.handle_new_data(next(it)), frames)
+        per_frame = sum(samples) / len(samples)
+        for rate in rates:
+            results.append({
+                'bench': 'handle_new_data',
+                'params': {'bikes': len(keys), 'rate_hz': rate},
+                'metrics': {**summary(samples),
+                            'frames_per_s': 1.0 / per_frame,
+                            'gui_thread_load': per_frame * rate},
+            })
+        engine.close()
+
+
+def bench_stop(results, sizes, xlsx_sizes):
+    from session_store import SessionStore, append_xlsx
+    for n in sizes:
+        path = f"bench-{n}.db"
+        store = SessionStore(path)
+        store.append_many(fake_records(n))
+        recs = iter(fake_records(50, start=time.time()))
+        samples = timed(lambda: store.append(next(recs)), 50)
+        results.append({'bench': 'session_stop.store_append', 'params': {'history_rows': n},
+                        'metrics': summary(samples)})
+        store.close()
+    for n in xlsx_sizes:
+        path = f"bench-{n}.xlsx"
+        append_xlsx(path, fake_records(n))
+        repeat = 5 if n <= 10000 else 2   # a 100k-row append takes tens of seconds
+        recs = iter(fake_records(repeat, start=time.time()))
+        samples = timed(lambda: append_xlsx(path, [next(recs)]), repeat)
+        results.append({'bench': 'session_stop.xlsx_mirror', 'params': {'history_rows': n},
+                        'metrics': summary(samples)})
+    # what the engine thread pays: SessionTracker.stop -> persistence queue
+    engine = make_engine()
+    tr = engine.trackers["Cycle 1"]
+
+    def start_stop():
+        tr.start("Bench")
+        tr.stop()
+    samples = timed(start_stop, 200)
+    results.append({'bench': 'session_stop.gui_thread', 'params': {},
+                    'metrics': summary(samples)})
+    engine.close()
+
+
+def bench_leaderboard(results, sizes):
+    from session_store import SessionStore
+    from leaderboard import Leaderboard
+    from leaderboard_data import LeaderboardData
+    for n in sizes:
+        store = SessionStore(f"lb-{n}.db")
+        store.append_many(fake_records(n))
+        lb = Leaderboard(LeaderboardData(store))
+        first = timed(lb.load_data, 1)
+        again = timed(lb.load_data, 5)
+        refresh = timed(lb.refresh_leaderboard, 5)
+        lb.student_cb.setCurrentIndex(1)
+        student = timed(lb.refresh_leaderboard, 5)
+        for name, samples in [('load_data.first', first), ('load_data.cached', again),
+                              ('refresh_leaderboard.ranking', refresh),
+                              ('refresh_leaderboard.student', student)]:
+            results.append({'bench': f'leaderboard.{name}', 'params': {'history_rows': n},
+                            'metrics': summary(samples)})
+        lb.deleteLater()
+        store.close()
+
+
+def bench_update_ui(results, sizes):
+    app = make_app()
+    for n in sizes:
+        app.engine.session_logs = fake_records(n)
+        app.live_model.set_finished(app.engine.session_logs)
+        for i, cyc in enumerate(list(app.trackers)[:8]):
+            app.trackers[cyc].start(f"Rider {i}")
+        samples = timed(app.update_ui, 50)
+        results.append({'bench': 'update_ui', 'params': {'rows': n, 'active': 8},
+                        'metrics': summary(samples)})
+        for tr in app.trackers.values():
+            tr.stop()
+    app.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--full", action="store_true", help="include the 100k-row sizes")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    ap.add_argument("--only", choices=["ingest", "stop", "leaderboard", "update_ui"], action="append")
+    args = ap.parse_args()
+
+    big = [10, 1000, 10000, 100000] if args.full else [10, 1000, 10000]
+    xlsx = [10, 1000, 10000, 100000] if args.full else [10, 1000]
+    out = os.path.abspath(args.out) if args.out else None
+
+    qapp = QApplication.instance() or QApplication(sys.argv)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            only = args.only or ["ingest", "stop", "leaderboard", "update_ui"]
+            if "ingest" in only:
+                bench_ingest(results, [8, 16, 32], [5, 10, 20], 2000)
+            if "stop" in only:
+                bench_stop(results, big, xlsx)
+            if "leaderboard" in only:
+                bench_leaderboard(results, big)
+            if "update_ui" in only:
+                bench_update_ui(results, big)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        'meta': {'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'full': args.full},
+        'results': results,
+    }
+    qapp.quit()
+    text = json.dumps(report, indent=2)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+# engine.py
+"""Headless core of the station: telemetry in, sessions out.
+
+TrackerEngine owns the transport poller, the energy integration, the
+per-bike trackers, the journal and persistence. It needs a Qt event loop
+(QCoreApplication is enough) but no display, so it can run on a small
+always-on box:
+
+    python engine.py                 # serves the local API on api_port
+
+The GUI (ui.EnergyApp) is a thin client of the same object, and other
+displays can use the JSON API, or subscribe to the live feed (feed.py) on
+feed_port instead of polling:
+
+    GET  /state                      live state of every bike
+    GET  /sessions?since=N           completed sessions, from index N
+    POST /start   {"cycle": "Cycle 1", "student": "Ana"}
+    POST /stop    {"cycle": "Cycle 1"}
+    POST /reset
+    GET  /delta?since=N&limit=M      sessions recorded here after id N (sync.py)
+
+Errors come back as {"error": ...}: 400 for a bad request, 409 when a
+start/stop can't be honoured, 503 when the engine thread is too busy to
+get to it within 5 s (the request is then dropped, not run late; one it
+has already started is answered when it finishes).
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from tracker import SessionTracker
+from energy import EnergyEngine
+from session_store import SessionStore
+from archive import SessionArchive
+from persistence import PersistenceWorker
+from journal import SessionJournal
+from telemetry_recorder import TelemetryRecorder
+from power_history import PowerHistory
+from settings import load_settings, bike_map
+from metrics import REGISTRY, serve_metrics
+from feed import LiveFeed
+from sync import StationSync, station_name, delta
+
+GAP_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+class SessionError(Exception):
+    """A start/stop request that can't be honoured (message is user-facing)."""
+
+
+class TrackerEngine(QObject):
+    """Pollers, trackers and persistence, without any widgets.
+
+    All state is owned by the thread that created the engine; API threads
+    go through call(), which runs the work there. Listeners hear about
+    session changes through the signals below; live values are read with
+    state() (or straight from `trackers`) whenever a display redraws.
+    """
+    session_started = pyqtSignal(dict)
+    session_stopped = pyqtSignal(dict)
+    sessions_reset = pyqtSignal()
+    sessions_stored = pyqtSignal(int)   # a batch reached sessions.db (from the persistence thread)
+    synced = pyqtSignal(object)   # (exported, {station: imported}), from the sync thread
+    _invoke = pyqtSignal(object)
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings or load_settings()
+        self._owner = threading.get_ident()
+        self._invoke.connect(self._run_invoked)
+
+        self.channel_map = bike_map(self.settings['boards'])
+        self.energy = EnergyEngine(
+            self.channel_map,
+            resistance=self.settings['load_resistance_ohm'],
+            calibration=self.settings['calibration'],
+            max_gap=self.settings['max_sample_gap_s'],
+        )
+        self.store = SessionStore()
+        self.store.import_legacy_xlsx()
+        self.persistence = PersistenceWorker(
+            self.store, xlsx_path="log.xlsx" if self.settings['mirror_log_xlsx'] else None,
+            on_stored=self.sessions_stored.emit)
+        self.persistence.start()
+        self.archive = SessionArchive(self.store)
+        self.compaction = None
+        if self.settings['archive_keep_days']:
+            # log.xlsx is trimmed even when it is no longer mirrored: it still
+            # holds the days written before
+            self.compaction = self.archive.start_compaction(
+                max(31, self.settings['archive_keep_days']), "log.xlsx", self.persistence.xlsx_lock)
+        self.trackers = {name: SessionTracker(name, self.energy, self.persistence) for name in self.energy.names}
+        self.recorder = None
+        if self.settings['record_telemetry']:
+            self.recorder = TelemetryRecorder(self.channel_map.keys())
+            self.recorder.start()
+        # per-bike power curves for the live charts; sized for poll_rate_hz,
+        # so pushed frames at a higher rate simply cover a shorter span
+        self.history = PowerHistory(self.energy.names, capacity=int(
+            self.settings['chart_history_s'] * max(self.settings['poll_rate_hz'], 1.0)))
+        self.session_logs = []
+        self.riding = {}          # student -> cycle, for the "already cycling" check
+        self.frames_in = 0
+        self.last_sample = {}
+        self.sample_gap = REGISTRY.histogram("sample_gap_seconds", "Time between frames from a board", buckets=GAP_BUCKETS)
+        self.metrics_server = None
+        if self.settings['metrics_port']:
+            try:
+                self.metrics_server = serve_metrics(self.settings['metrics_port'])
+            except OSError as e:
+                print(f"[WARN] Metrics endpoint disabled: {e}")
+        self.api_server = None
+        self.feed = None
+        if self.settings['feed_port']:
+            try:
+                self.feed = LiveFeed(self.settings['api_host'], self.settings['feed_port'],
+                                     snapshot=lambda: self.call(self.state))
+            except OSError as e:
+                print(f"[WARN] Live feed disabled: {e}")
+        self.journal = SessionJournal()
+        self.restore_from_journal()
+
+        self.checkpoint_timer = QTimer(self)
+        self.checkpoint_timer.timeout.connect(self.checkpoint)
+        self.checkpoint_timer.start(int(self.settings['checkpoint_interval_s'] * 1000))
+        self.station = station_name(self.settings)
+        self.sync = None
+        if self.settings['sync_dir']:
+            self.sync = StationSync(self.store, self.settings, self.archive)
+            self.sync_timer = QTimer(self)
+            self.sync_timer.timeout.connect(self.start_sync)
+            self.sync_timer.start(int(self.settings['sync_interval_s'] * 1000))
+            self.start_sync()
+        if self.settings['metrics_file']:
+            self.metrics_timer = QTimer(self)
+            self.metrics_timer.timeout.connect(self.write_metrics)
+            self.metrics_timer.start(5000)
+
+        self.poller_thread = QThread()
+        self.poller = self.create_poller()
+        self.poller.moveToThread(self.poller_thread)
+        self.poller_thread.started.connect(self.poller.run)
+        self.poller.data_received.connect(self.handle_new_data)
+        self.poller_thread.start()
+
+    def create_poller(self):
+        # only the selected transport is imported (requests / pyserial are slow to load)
+        boards = self.settings['boards']
+        transport = self.settings['transport']
+        if transport in ("udp", "http"):
+            from push_receiver import UdpReceiver, HttpPushReceiver
+            receiver = UdpReceiver if transport == "udp" else HttpPushReceiver
+            return receiver(self.settings['push_host'], self.settings['push_port'],
+                            namespaced=len(boards) > 1)
+        if transport == "serial":
+            from serial_listener import SerialPoller
+            return SerialPoller(self.settings['serial_port'], self.settings['serial_baud'],
+                                namespaced=len(boards) > 1,
+                                backoff_max=self.settings['backoff_max_s'])
+        from wifi_listener import WifiPoller, MultiBoardPoller
+        opts = dict(
+            rate_hz=self.settings['poll_rate_hz'],
+            timeout=self.settings['poll_timeout_s'],
+            backoff_max=self.settings['backoff_max_s'],
+        )
+        if len(boards) == 1:
+            return WifiPoller(url=boards[0]['url'], board_id=boards[0]['id'], **opts)
+        return MultiBoardPoller(boards, **opts)
+
+    def handle_new_data(self, data):
+        self.energy.ingest(data)
+        self.history.append(data.get('timestamp') or time.time(), self.energy.power)
+        # one receive time per board (MultiBoardPoller) or for the whole frame
+        for board, ts in (data.get('boards') or {None: data.get('timestamp')}).items():
+            last = self.last_sample.get(board)
+            if last is not None and ts is not None and ts > last:
+                self.sample_gap.observe(ts - last)
+            self.last_sample[board] = ts
+        if self.recorder is not None:
+            self.recorder.record(data)
+        self.frames_in += 1
+        if self.feed is not None and self.feed.subscribers:
+            self.feed.publish({
+                'type': 'frame', 'timestamp': data.get('timestamp'),
+                'power': dict(zip(self.energy.names, self.energy.power.tolist())),
+                'session_kwh': {cyc: tr.energy_kwh for cyc, tr in self.trackers.items() if tr.running},
+            }, frame=True)
+
+    def restore_from_journal(self):
+        t0 = time.perf_counter()
+        state = self.journal.replay()
+        for cyc, run in state['running'].items():
+            if cyc in self.trackers:
+                self.trackers[cyc].restore(run['student'], run['start'], run['energy_j'], run['session_id'])
+                self.riding[run['student']] = cyc
+        self.session_logs = state['logs']
+        # a stop can be journaled before the persistence worker stored it;
+        # re-queue them all, the store skips session_ids it already has
+        for record in self.session_logs:
+            self.persistence.append(record)
+        self.journal.open(state)
+        self.restored_msg = None
+        if state['running'] or state['logs']:
+            self.restored_msg = (
+                f"Recovered {len(state['running'])} running and {len(state['logs'])} logged"
+                f" session(s) in {(time.perf_counter() - t0) * 1000:.0f} ms"
+            )
+            print(self.restored_msg)
+
+    def journal_state(self):
+        return {
+            'running': {
+                cyc: {'session_id': tr.session_id, 'student': tr.current_student,
+                      'start': tr.start_time, 'energy_j': tr.energy_j}
+                for cyc, tr in self.trackers.items() if tr.running
+            },
+            'logs': self.session_logs,
+        }
+
+    def checkpoint(self):
+        if self.journal.lines >= self.journal.compact_every:
+            self.journal.compact(self.journal_state())
+            return
+        energy = {cyc: tr.energy_j for cyc, tr in self.trackers.items() if tr.running}
+        if energy:
+            self.journal.record('energy', energy=energy)
+
+    def write_metrics(self):
+        try:
+            REGISTRY.write(self.settings['metrics_file'])
+        except OSError as e:
+            print(f"[ERROR] Failed to write metrics: {e}")
+
+    # --- session API -------------------------------------------------------
+
+    def start_session(self, cycle, student):
+        """Start `student` on `cycle`; returns the live state of that bike."""
+        if not student:
+            raise SessionError("Select a student")
+        tr = self.trackers.get(cycle)
+        if tr is None:
+            raise SessionError(f"Unknown bike {cycle}")
+        if tr.running:
+            raise SessionError(f"{cycle} already running")
+        if student in self.riding:
+            raise SessionError(f"{student} already cycling")
+        tr.start(student)
+        self.riding[student] = cycle
+        self.journal.record('start', cycle=cycle, student=student, start=tr.start_time, session_id=tr.session_id)
+        live = self.bike_state(tr)
+        self.session_started.emit(live)
+        self._publish({'type': 'start', **live})
+        return live
+
+    def stop_session(self, cycle):
+        """Stop the session on `cycle`; returns its record, or None if idle."""
+        tr = self.trackers.get(cycle)
+        if tr is None:
+            raise SessionError(f"Unknown bike {cycle}")
+        if not tr.running:
+            return None
+        record = tr.stop()
+        self.riding.pop(record['student'], None)
+        self.session_logs.append(record)
+        self.journal.record('stop', cycle=cycle, record=record)
+        self.session_stopped.emit(record)
+        self._publish({'type': 'stop', **record})
+        return record
+
+    def reset_all_sessions(self):
+        """Stop every bike and clear the day's completed list."""
+        for t in self.trackers.values():
+            t.stop()
+        self.riding.clear()
+        self.session_logs.clear()
+        self.journal.record('reset')
+        self.sessions_reset.emit()
+        self._publish({'type': 'reset'})
+
+    def _publish(self, event):
+        if self.feed is not None:
+            self.feed.publish(event)
+
+    def bike_state(self, tr):
+        return {
+            'cycle': tr.cycle_id, 'running': tr.running, 'student': tr.current_student,
+            'session_id': tr.session_id, 'start': tr.start_time,
+            'energy_kwh': tr.energy_kwh, 'power': tr.power,
+        }
+
+    def state(self):
+        """Live snapshot of every bike."""
+        return {
+            'timestamp': time.time(),
+            'frames_in': self.frames_in,
+            'bikes': [self.bike_state(tr) for tr in self.trackers.values()],
+        }
+
+    def sessions(self, since=0):
+        """Completed sessions, from position `since` in today's list."""
+        return self.session_logs[since:]
+
+    def start_sync(self):
+        """Export/merge with the other stations in the background (see sync.py)."""
+        if self.sync is not None:
+            self.sync.start(self.synced.emit)
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the engine's thread and return (or raise) its result."""
+        if threading.get_ident() == self._owner:
+            return fn(*args)
+        job = Future()
+        self._invoke.emit((job, fn, args))
+        try:
+            return job.result(timeout=5.0)
+        except FutureTimeout:
+            if job.cancel():   # the engine thread hasn't got to it yet, so it never runs
+                raise
+        return job.result()   # already running: its effect happens, so report it
+
+    def _run_invoked(self, item):
+        job, fn, args = item
+        if not job.set_running_or_notify_cancel():
+            return   # the caller timed out
+        try:
+            job.set_result(fn(*args))
+        except Exception as e:
+            job.set_exception(e)
+
+    def serve_api(self, port, host="127.0.0.1"):
+        """Serve the JSON API (module docstring) from a daemon thread."""
+        self.api_server = ThreadingHTTPServer((host, port), _ApiHandler)
+        self.api_server.daemon_threads = True
+        self.api_server.engine = self
+        threading.Thread(target=self.api_server.serve_forever, name="api", daemon=True).start()
+        return self.api_server
+
+    def close(self):
+        self.checkpoint_timer.stop()
+        self.poller.stop()
+        self.poller_thread.quit()
+        self.poller_thread.wait(2000)
+        if self.api_server is not None:
+            self.api_server.shutdown()
+        if self.feed is not None:
+            self.feed.close()
+        self.persistence.close()
+        if self.sync is not None:
+            self.sync_timer.stop()
+            self.sync.wait()
+        if self.compaction is not None:
+            self.compaction.join()   # it writes to the store until it is done
+        self.store.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.journal.close()
+        if self.settings['metrics_file']:
+            self.write_metrics()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        engine = self.server.engine
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/state":
+                self._reply(200, engine.call(engine.state))
+            elif url.path == "/sessions":
+                since = int(query.get('since', ['0'])[0])
+                self._reply(200, engine.call(engine.sessions, since))
+            elif url.path == "/delta":
+                # the store is thread-safe, so this doesn't go through the engine thread
+                since = int(query.get('since', ['0'])[0])
+                limit = int(query['limit'][0]) if 'limit' in query else None
+                self._reply(200, delta(engine.store, engine.station, since, limit, engine.archive))
+            else:
+                self._reply(404, {'error': f"no such endpoint {url.path}"})
+        except FutureTimeout:
+            self._reply(503, {'error': "engine busy, try again"})
+        except ValueError as e:
+            self._reply(400, {'error': f"bad request: {e}"})
+
+    def do_POST(self):
+        engine = self.server.engine
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/start":
+                student = body.get('student')
+                if not student or not isinstance(student, str):
+                    raise ValueError("'student' must be a non-empty string")
+                self._reply(200, engine.call(engine.start_session, body['cycle'], student))
+            elif self.path == "/stop":
+                self._reply(200, engine.call(engine.stop_session, body['cycle']))
+            elif self.path == "/reset":
+                engine.call(engine.reset_all_sessions)
+                self._reply(200, {})
+            else:
+                self._reply(404, {'error': f"no such endpoint {self.path}"})
+        except SessionError as e:
+            self._reply(409, {'error': str(e)})
+        except FutureTimeout:
+            self._reply(503, {'error': "engine busy, try again"})
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': f"bad request: {e}"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    import signal
+    import sys
+    from PyQt5.QtCore import QCoreApplication
+    app = QCoreApplication(sys.argv)
+    engine = TrackerEngine()
+    port = engine.settings['api_port']
+    engine.serve_api(port, engine.settings['api_host'])
+    print(f"Engine API on http://{engine.settings['api_host']}:{port}/ ({len(engine.trackers)} bikes)")
+    # Ctrl+C: Python only sees the signal when the Qt loop hands control back
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    tick = QTimer()
+    tick.timeout.connect(lambda: None)
+    tick.start(250)
+    app.exec_()
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# feed.py
+"""Local publish/subscribe feed of live frames and session events.
+
+Displays connect over TCP and read newline-delimited JSON:
+
+    {"type": "snapshot", ...engine.state()...}     once, on connect
+    {"type": "frame", "timestamp": ..., "power": {...}, "session_kwh": {...}}
+    {"type": "start", ...} / {"type": "stop", ...} / {"type": "reset"}
+
+Each message is serialized once and handed to every subscriber. Slow
+clients never hold up ingest: a subscriber only ever has the newest frame
+pending (older ones are skipped, so it sees sampled frames), and one that
+lets `max_events` session events pile up is disconnected.
+"""
+import json
+import socket
+import threading
+from collections import deque
+from metrics import REGISTRY
+
+
+class _Subscriber:
+    def __init__(self, conn, addr, max_events):
+        self.conn = conn
+        self.addr = addr
+        self.events = deque()
+        self.max_events = max_events
+        self.frame = None          # latest unsent frame; overwritten, never queued
+        self.closed = False
+        self.cond = threading.Condition()
+
+
+class LiveFeed:
+    """TCP fan-out server; publish() is safe to call from the ingest thread."""
+
+    def __init__(self, host="127.0.0.1", port=8766, snapshot=None, max_events=1000):
+        self.snapshot = snapshot   # callable returning the state sent on connect
+        self.max_events = max_events
+        self.subscribers = []
+        self._lock = threading.Lock()
+        self.sock = socket.create_server((host, port))
+        self.port = self.sock.getsockname()[1]
+        self.clients = REGISTRY.gauge("feed_subscribers", "Connected live feed clients")
+        self.skipped = REGISTRY.counter("feed_frames_skipped_total", "Frames replaced before a slow client read them")
+        self.dropped = REGISTRY.counter("feed_clients_dropped_total", "Clients disconnected for falling behind")
+        threading.Thread(target=self._accept, name="feed", daemon=True).start()
+
+    def publish(self, msg, frame=False):
+        """Queue `msg` for every subscriber; frames replace any unsent frame."""
+        if not self.subscribers:
+            return
+        line = (json.dumps(msg) + "\n").encode()
+        for sub in list(self.subscribers):
+            if sub.closed:
+                continue
+            with sub.cond:
+                if frame:
+                    if sub.frame is not None:
+                        self.skipped.inc()
+                    sub.frame = line
+                elif len(sub.events) >= sub.max_events:
+                    self.dropped.inc()
+                    print(f"[WARN] live feed client {sub.addr[0]}:{sub.addr[1]} too slow, dropped")
+                    self._drop(sub)
+                else:
+                    sub.events.append(line)
+                sub.cond.notify()
+
+    def _drop(self, sub):
+        """Disconnect `sub` now, even if its sender is blocked in sendall()."""
+        sub.closed = True
+        with self._lock:
+            self.subscribers = [s for s in self.subscribers if s is not sub]
+            self.clients.set(len(self.subscribers))
+        try:
+            sub.conn.shutdown(socket.SHUT_RDWR)   # wakes a blocked sendall() with an error
+        except OSError:
+            pass
+
+    def _accept(self):
+        while True:
+            try:
+                conn, addr = self.sock.accept()
+            except OSError:
+                return  # closed
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sub = _Subscriber(conn, addr, self.max_events)
+            if self.snapshot is not None:
+                try:
+                    sub.events.append((json.dumps({'type': 'snapshot', **self.snapshot()}) + "\n").encode())
+                except Exception as e:
+                    print(f"Error: live feed snapshot failed: {e}")
+            with self._lock:
+                self.subscribers = self.subscribers + [sub]
+                self.clients.set(len(self.subscribers))
+            threading.Thread(target=self._send, args=(sub,), name="feed-client", daemon=True).start()
+
+    def _send(self, sub):
+        try:
+            while True:
+                with sub.cond:
+                    while not (sub.events or sub.frame or sub.closed):
+                        sub.cond.wait()
+                    if sub.closed:
+                        break
+                    lines = list(sub.events)
+                    sub.events.clear()
+                    if sub.frame is not None:
+                        lines.append(sub.frame)
+                        sub.frame = None
+                sub.conn.sendall(b"".join(lines))  # blocks only this client's thread
+        except OSError:
+            pass  # client went away
+        finally:
+            self._drop(sub)
+            sub.conn.close()
+
+    def close(self):
+        self.sock.close()
+        for sub in list(self.subscribers):
+            with sub.cond:
+                sub.closed = True
+                sub.cond.notify()
+
+
+def subscribe(host="127.0.0.1", port=8766):
+    """Yield feed messages as dicts until the connection closes (for displays)."""
+    with socket.create_connection((host, port)) as sock:
+        for line in sock.makefile("r", encoding="utf-8"):
+            yield json.loads(line)
+
+
+if __name__ == "__main__":
+    import sys
+    for msg in subscribe(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8766):
+        print(msg)
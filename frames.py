@@ -0,0 +1,100 @@
+# frames.py
+"""Compact binary telemetry frame shared by the push and serial transports.
+
+Layout (little-endian):
+
+    magic    2 bytes   0xB1 0xCE
+    board    uint8     board number (1 = "B1")
+    count    uint8     number of channels
+    voltages float32 * count, channel 1 first
+    crc      uint16    CRC-CCITT over board, count and voltages
+"""
+import binascii
+import struct
+
+MAGIC = b"\xb1\xce"
+HEADER = struct.Struct("<2sBB")
+CRC = struct.Struct("<H")
+MAX_CHANNELS = 64
+
+
+def frame_size(count):
+    return HEADER.size + 4 * count + CRC.size
+
+
+def encode_frame(board, voltages):
+    body = struct.pack(f"<BB{len(voltages)}f", board, len(voltages), *voltages)
+    return MAGIC + body + CRC.pack(binascii.crc_hqx(body, 0xFFFF))
+
+
+def decode_frame(buf):
+    """Return (board, voltages) for one complete frame, or raise ValueError."""
+    if len(buf) < HEADER.size or buf[:2] != MAGIC:
+        raise ValueError("not a telemetry frame")
+    _, board, count = HEADER.unpack_from(buf)
+    if count > MAX_CHANNELS or len(buf) != frame_size(count):
+        raise ValueError("bad frame length")
+    body = bytes(buf[2:HEADER.size + 4 * count])
+    (crc,) = CRC.unpack_from(buf, len(buf) - CRC.size)
+    if binascii.crc_hqx(body, 0xFFFF) != crc:
+        raise ValueError("frame CRC mismatch")
+    return board, struct.unpack_from(f"<{count}f", body, 2)
+
+
+def to_channels(board, voltages, namespaced=False):
+    """Turn decoded voltages into the `channels` list WifiPoller emits."""
+    prefix = f"B{board}:" if namespaced else ""
+    return [{'channel': f"{prefix}C{i + 1}", 'voltage': v} for i, v in enumerate(voltages)]
+
+
+class FrameParser:
+    """Splits a byte stream (e.g. a serial port) into frames.
+
+    Feed it whatever bytes arrived; it returns every complete, CRC-valid
+    frame and keeps any partial tail for the next call. On a bad length or
+    CRC it skips one byte and hunts for the next magic, so a corrupt or
+    truncated frame costs at most that frame.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.frames = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def feed(self, data):
+        buf = self.buf
+        buf += data
+        out = []
+        pos = 0
+        while True:
+            start = buf.find(MAGIC, pos)
+            if start < 0:
+                # keep a trailing first magic byte, it may be half a header
+                # (never one already consumed as a frame's last CRC byte)
+                keep = max(pos, len(buf) - 1 if buf[-1:] == MAGIC[:1] else len(buf))
+                self.skipped += keep - pos
+                pos = keep
+                break
+            self.skipped += start - pos
+            pos = start
+            if len(buf) - pos < HEADER.size:
+                break
+            count = buf[pos + 3]
+            if count > MAX_CHANNELS:
+                self.errors += 1
+                pos += 1
+                continue
+            size = frame_size(count)
+            if len(buf) - pos < size:
+                break
+            try:
+                out.append(decode_frame(bytes(buf[pos:pos + size])))
+            except ValueError:
+                self.errors += 1
+                pos += 1
+                continue
+            self.frames += 1
+            pos += size
+        del buf[:pos]
+        return out
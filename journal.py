@@ -0,0 +1,129 @@
+# journal.py
+import json
+import os
+import queue
+import threading
+import time
+
+JOURNAL_PATH = "sessions.journal"
+
+_CLOSE = object()
+
+
+class SessionJournal:
+    """Append-only, crash-safe journal of the running app state.
+
+    Every start/stop/reset plus a periodic energy checkpoint is appended as
+    one JSON line by a background writer, which batches fsync()s so the GUI
+    thread never waits on the disk. replay() folds the lines back into the
+    running sessions and session_logs; compact() replaces the history with a
+    single snapshot line once the file gets long. A clean shutdown writes a
+    "closed" marker, so only an unclean exit is restored on the next start.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, fsync_interval=1.0, compact_every=2000):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.lines = 0
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def replay(self):
+        """Return {'running': {cycle: {...}}, 'logs': [...]} left by an unclean exit."""
+        state = {'running': {}, 'logs': []}
+        if not os.path.exists(self.path):
+            return state
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ev = json.loads(line)
+                    state = self._apply(state, ev)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    break  # torn or garbled last line from the crash
+                self.lines += 1
+                if ev['type'] == 'closed':
+                    self.lines = 0
+        return state
+
+    @staticmethod
+    def _apply(state, ev):
+        """Fold one journal line into `state`; raises KeyError etc. on a malformed line."""
+        kind = ev['type']
+        if kind == 'snapshot':
+            return {'running': dict(ev['running']), 'logs': list(ev['logs'])}
+        if kind == 'start':
+            state['running'][ev['cycle']] = {
+                'session_id': ev['session_id'], 'student': ev['student'],
+                'start': ev['start'], 'energy_j': 0.0}
+        elif kind == 'energy':
+            for cycle, energy_j in ev['energy'].items():
+                if cycle in state['running']:
+                    state['running'][cycle]['energy_j'] = energy_j
+        elif kind == 'stop':
+            record = ev['record']
+            state['running'].pop(ev['cycle'], None)
+            state['logs'].append(record)
+        elif kind in ('reset', 'closed'):
+            return {'running': {}, 'logs': []}
+        return state
+
+    def open(self, state=None):
+        """Start the writer, beginning the file with `state` (what replay() restored)."""
+        state = state or {'running': {}, 'logs': []}
+        self._rewrite({'type': 'snapshot', **state})
+        self._writer = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._writer.start()
+
+    def record(self, kind, **fields):
+        self._queue.put({'type': kind, 'ts': time.time(), **fields})
+        self.lines += 1
+
+    def compact(self, state):
+        """Swap the whole history for one snapshot of `state`."""
+        self._queue.put(('compact', {'type': 'snapshot', **state}))
+        self.lines = 1
+
+    def close(self):
+        self.record('closed')
+        self._queue.put(_CLOSE)
+        if self._writer is not None:
+            self._writer.join(5.0)
+
+    def _rewrite(self, snapshot):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        f = open(self.path, "a", encoding="utf-8")
+        last_sync = time.monotonic()
+        dirty = False
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.fsync_interval if dirty else None)
+                except queue.Empty:
+                    item = None
+                if item is _CLOSE:
+                    break
+                if isinstance(item, tuple):
+                    f.close()
+                    self._rewrite(item[1])
+                    f = open(self.path, "a", encoding="utf-8")
+                    dirty = False
+                elif item is not None:
+                    f.write(json.dumps(item) + "\n")
+                    dirty = True
+                if dirty and (item is None or time.monotonic() - last_sync >= self.fsync_interval):
+                    f.flush()
+                    os.fsync(f.fileno())
+                    last_sync = time.monotonic()
+                    dirty = False
+        finally:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
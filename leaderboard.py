@@ -1,12 +1,16 @@
 #leaderboard.py
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QComboBox, QHeaderView
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QTableView, QComboBox, QHeaderView, QLineEdit
 from PyQt5.QtGui import QPalette, QLinearGradient, QColor, QBrush, QFont
-import pandas as pd
-import warnings
+from PyQt5.QtCore import Qt
+from leaderboard_model import ColumnarTableModel, make_proxy
+
+# (label, RollupIndex window)
+WINDOWS = [("Today", "today"), ("This Week", "week"), ("This Month", "month"), ("All Time", "all")]
 
 class Leaderboard(QDialog):
-    def __init__(self):
+    def __init__(self, data):
         super().__init__()
+        self.data = data  # leaderboard_data.LeaderboardData, shared across opens
         self.setModal(True)
         self.setWindowTitle("🏆 Leaderboard")
         self.resize(800, 600)
@@ -20,104 +24,78 @@ class Leaderboard(QDialog):
         self.setAutoFillBackground(True)
         self.setPalette(pal)
 
-        self.full_data = pd.DataFrame()
-
         layout = QVBoxLayout(self)
 
-        # Student filter combo
+        # Student filter and time window combos
+        filters = QHBoxLayout()
         self.student_cb = QComboBox()
         self.student_cb.setFont(QFont('Arial', 14))
         self.student_cb.addItem("All Students")
         self.student_cb.currentIndexChanged.connect(self.refresh_leaderboard)
-        layout.addWidget(self.student_cb)
-
-        # Leaderboard table
-        self.table = QTableWidget(0, 5)
+        filters.addWidget(self.student_cb, 3)
+        self.window_cb = QComboBox()
+        self.window_cb.setFont(QFont('Arial', 14))
+        for label, window in WINDOWS:
+            self.window_cb.addItem(label, window)
+        self.window_cb.setCurrentIndex(len(WINDOWS) - 1)
+        self.window_cb.currentIndexChanged.connect(self.refresh_leaderboard)
+        filters.addWidget(self.window_cb, 1)
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setFont(QFont('Arial', 14))
+        self.filter_edit.setPlaceholderText("Filter...")
+        filters.addWidget(self.filter_edit, 2)
+        layout.addLayout(filters)
+
+        # Leaderboard table: only the visible rows are ever formatted
+        self.model = ColumnarTableModel(self)
+        self.proxy = make_proxy(self.model, self)
+        self.filter_edit.textChanged.connect(self.proxy.setFilterFixedString)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
         self.table.setFont(QFont('Arial', 12))
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet(
-            "QTableWidget { background: rgba(255,255,255,220); }"
+            "QTableView { background: rgba(255,255,255,220); }"
             " QHeaderView::section { background: #004d40; color: white; font-size: 16px; padding: 6px; }"
-            " QTableWidget::item { padding: 8px; }"
+            " QTableView::item { padding: 8px; }"
         )
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Stretch)
+        header.setFixedHeight(40)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         layout.addWidget(self.table)
 
-        self.load_data()
-
     def load_data(self):
-        # Suppress date parsing warnings
-        warnings.filterwarnings('ignore', "Could not infer format*")
         try:
-            df = pd.read_excel("log.xlsx", parse_dates=["Start", "End"])
+            new = self.data.refresh()
         except Exception as e:
             print(f"[ERROR] Failed to load leaderboard data: {e}")
-            self.full_data = pd.DataFrame()
-            self.refresh_leaderboard()
-            return
-
-        df = df.dropna(subset=["Start", "End"])
-        self.full_data = df
-
-        # Populate student combo
-        students = sorted(df['Student'].dropna().unique().tolist())
-        self.student_cb.clear()
-        self.student_cb.addItem("All Students")
-        self.student_cb.addItems(students)
+            new = 0
+
+        # Populate student combo (only when there is something new)
+        if new or self.student_cb.count() == 1:
+            selected = self.student_cb.currentText()
+            self.student_cb.blockSignals(True)
+            self.student_cb.clear()
+            self.student_cb.addItem("All Students")
+            self.student_cb.addItems(self.data.students)
+            self.student_cb.setCurrentText(selected)
+            self.student_cb.blockSignals(False)
 
         self.refresh_leaderboard()
 
     def refresh_leaderboard(self):
-        self.table.clearContents()
         selected = self.student_cb.currentText()
 
         if selected and selected != "All Students":
-            # Detailed sessions view
-            headers = ["Cycle", "Start", "End", "Duration (s)", "Energy (kWh)"]
-            self.table.setColumnCount(len(headers))
-            self.table.setHorizontalHeaderLabels(headers)
-            header = self.table.horizontalHeader()
-            header.setSectionResizeMode(QHeaderView.Stretch)
-            header.setFixedHeight(40)
-
-            records = self.full_data[self.full_data['Student'] == selected].to_dict('records')
-            self.table.setRowCount(len(records))
-            for i, rec in enumerate(records):
-                cycle = rec.get('Cycle', '')
-                start = rec['Start'].strftime('%H:%M:%S')
-                end = rec['End'].strftime('%H:%M:%S')
-                duration = int((rec['End'] - rec['Start']).total_seconds())
-                energy = rec.get('Energy (kWh)', 0.0)
-                values = [cycle, start, end, str(duration), f"{energy:.3f}"]
-                for j, val in enumerate(values):
-                    item = QTableWidgetItem(val)
-                    item.setFont(QFont('Arial', 12))
-                    self.table.setItem(i, j, item)
+            # Detailed sessions view, oldest first
+            self.model.show_sessions(self.data.sessions(selected))
+            self.table.sortByColumn(1, Qt.AscendingOrder)
         else:
-            # Aggregated leaderboard view
-            headers = ["Student", "Total Energy (kWh)", "Sessions"]
-            self.table.setColumnCount(len(headers))
-            self.table.setHorizontalHeaderLabels(headers)
-            header = self.table.horizontalHeader()
-            header.setSectionResizeMode(QHeaderView.Stretch)
-            header.setFixedHeight(40)
-
-            if self.full_data.empty:
-                self.table.setRowCount(0)
-                return
-
-            agg = self.full_data.groupby('Student').agg(
-                Sessions=pd.NamedAgg(column='Student', aggfunc='count'),
-                TotalEnergy=pd.NamedAgg(column='Energy (kWh)', aggfunc='sum')
-            ).reset_index().sort_values(by='TotalEnergy', ascending=False)
-
-            self.table.setRowCount(len(agg))
-            for i, row in enumerate(agg.itertuples(index=False)):
-                vals = [row.Student, f"{row.TotalEnergy:.3f}", str(row.Sessions)]
-                for j, val in enumerate(vals):
-                    item = QTableWidgetItem(val)
-                    if j == 0:
-                        item.setFont(QFont('Arial', 12, QFont.Bold))
-                    self.table.setItem(i, j, item)
+            # Aggregated leaderboard view, best first
+            self.model.show_ranking(self.data.rollups.top(window=self.window_cb.currentData()))
+            self.table.sortByColumn(1, Qt.DescendingOrder)
 
     def show(self):
         self.load_data()
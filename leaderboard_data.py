@@ -0,0 +1,64 @@
+# leaderboard_data.py
+from rollups import RollupIndex
+
+
+class LeaderboardData:
+    """Session history for the leaderboard, kept between dialog opens.
+
+    The first refresh() folds every session in the store (all days) into a
+    RollupIndex; later calls only fetch rows with a higher id than the last
+    one seen, so reopening the leaderboard costs O(new sessions) rather
+    than O(history).
+
+    With an archive.SessionArchive, archived months contribute their
+    manifest totals to the all-time ranking, and their rows are read only
+    when one student's sessions are shown (from the partitions holding
+    that student).
+    """
+
+    def __init__(self, store, archive=None):
+        self.store = store
+        self.archive = archive
+        self.archive_cutoff = None   # archived days are before this (as of the first refresh)
+        self.last_id = 0
+        self.rollups = RollupIndex()
+        self._loaded = False
+        self._archived = {}          # student -> archived session rows
+
+    @property
+    def students(self):
+        return self.rollups.students()
+
+    def refresh(self):
+        """Ingest sessions completed since the last call; returns how many."""
+        if self.archive is None:
+            return self._ingest()
+        with self.archive.lock:  # not while compaction is moving rows
+            if not self._loaded:
+                self.archive_cutoff = self.archive.cutoff
+                for by_student, by_bike in self.archive.summaries():
+                    self.rollups.add_totals(by_student, by_bike)
+                self._loaded = True
+            return self._ingest()
+
+    def sessions(self, student):
+        """[(cycle, start, end, duration, kwh)] of one student, archived ones first."""
+        recent = self.rollups.sessions(student)
+        if not self.archive_cutoff:
+            return recent
+        old = self._archived.get(student)
+        if old is None:
+            old = self._archived[student] = [
+                (cycle, start, end, duration, kwh)
+                for _, _, _, cycle, start, end, duration, _, kwh
+                in self.archive.query_archive(student=student, below=self.archive_cutoff)]
+        return old + recent
+
+    def _ingest(self):
+        rows = self.store.sessions(since_id=self.last_id)
+        add = self.rollups.add
+        for _, day, student, cycle, start, end, duration, _, kwh in rows:
+            add(day, student, cycle, start, end, duration, kwh)
+        if rows:
+            self.last_id = rows[-1][0]
+        return len(rows)
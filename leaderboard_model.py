@@ -0,0 +1,100 @@
+# leaderboard_model.py
+from datetime import datetime
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, QSortFilterProxyModel
+from PyQt5.QtGui import QFont
+
+SORT_ROLE = Qt.UserRole
+
+
+def _clock(ts):
+    return datetime.fromtimestamp(ts).strftime('%H:%M:%S')
+
+
+def _kwh(v):
+    return f"{v:.4f}"
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    """Read-only table over column lists, formatted lazily.
+
+    The view only asks for the rows it is drawing, and each cell's text is
+    formatted on first request and cached until the next set_columns(), so
+    filling the dialog costs O(visible rows) instead of O(history).
+    Raw values are exposed under SORT_ROLE for QSortFilterProxyModel.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = []
+        self.columns = []
+        self.formatters = []
+        self.bold_column = None
+        self._rows = 0
+        self._text = {}
+        self._bold = QFont('Arial', 12, QFont.Bold)
+
+    def set_columns(self, headers, columns, formatters, bold_column=None):
+        self.beginResetModel()
+        self.headers = headers
+        self.columns = [list(c) for c in columns]
+        self.formatters = formatters
+        self.bold_column = bold_column
+        self._rows = len(self.columns[0]) if self.columns else 0
+        self._text = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            key = (row, col)
+            text = self._text.get(key)
+            if text is None:
+                text = self._text[key] = self.formatters[col](self.columns[col][row])
+            return text
+        if role == SORT_ROLE:
+            return self.columns[col][row]
+        if role == Qt.FontRole and col == self.bold_column:
+            return self._bold
+        return QVariant()
+
+    # --- leaderboard views ---
+    def show_ranking(self, ranking):
+        """ranking: [(student, kwh, sessions)] as from RollupIndex.top()."""
+        students, totals, sessions = zip(*ranking) if ranking else ((), (), ())
+        self.set_columns(
+            ["Student", "Total Energy (kWh)", "Sessions"],
+            [students, totals, sessions],
+            [str, _kwh, str],
+            bold_column=0,
+        )
+
+    def show_sessions(self, records):
+        """records: [(cycle, start_ts, end_ts, duration, kwh)] for one student."""
+        cycles, starts, ends, _, energy = zip(*records) if records else ((), (), (), (), ())
+        durations = [int(e - s) for s, e in zip(starts, ends)]
+        self.set_columns(
+            ["Cycle", "Start", "End", "Duration (s)", "Energy (kWh)"],
+            [cycles, starts, ends, durations, energy],
+            [str, _clock, _clock, str, _kwh],
+        )
+
+
+def make_proxy(model, parent=None):
+    """Sorting/filtering proxy that sorts on raw values, filters on column 0."""
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    proxy.setFilterKeyColumn(0)
+    proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    return proxy
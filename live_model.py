@@ -0,0 +1,131 @@
+# live_model.py
+import time
+from datetime import datetime
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QBrush, QColor
+
+HEADERS = ["Cycle", "Student", "Start", "End", "Duration", "kWh"]
+ACTIVE_BRUSH = QBrush(QColor(255, 255, 200))
+
+
+def _clock(ts):
+    return datetime.fromtimestamp(ts).strftime('%H:%M:%S')
+
+
+class LiveSessionModel(QAbstractTableModel):
+    """Finished sessions followed by one row per running tracker.
+
+    Finished rows are formatted once when they are appended and never
+    touched again; running rows are re-formatted each tick and only cells
+    whose text changed are reported through dataChanged. Rows are
+    identified by their stable session ID.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.finished = []        # [(session_id, [cell text...])]
+        self.finished_row = {}    # session_id -> row
+        self.active = []          # [(session_id, cycle, [cell text...])]
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.finished) + len(self.active)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        row, n = index.row(), len(self.finished)
+        if role == Qt.DisplayRole:
+            if row < n:
+                return self.finished[row][1][index.column()]
+            return self.active[row - n][2][index.column()]
+        if role == Qt.BackgroundRole and row >= n:
+            return ACTIVE_BRUSH
+        return QVariant()
+
+    # --- lookups ---
+    def session_id(self, row):
+        n = len(self.finished)
+        return self.finished[row][0] if row < n else self.active[row - n][0]
+
+    def row_for(self, session_id):
+        row = self.finished_row.get(session_id)
+        if row is not None:
+            return row
+        for i, (sid, _, _) in enumerate(self.active):
+            if sid == session_id:
+                return len(self.finished) + i
+        return None
+
+    def cells(self, row):
+        n = len(self.finished)
+        return self.finished[row][1] if row < n else self.active[row - n][2]
+
+    # --- updates ---
+    def set_finished(self, records):
+        self.beginResetModel()
+        self.finished = [(r['session_id'], self._format_finished(r)) for r in records]
+        self.finished_row = {sid: i for i, (sid, _) in enumerate(self.finished)}
+        self.active = []
+        self.endResetModel()
+
+    def add_finished(self, record):
+        sid = record['session_id']
+        self._remove_active(sid)
+        row = len(self.finished)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.finished.append((sid, self._format_finished(record)))
+        self.finished_row[sid] = row
+        self.endInsertRows()
+
+    def update_active(self, trackers):
+        """Sync the running rows with `trackers` (cycle -> SessionTracker)."""
+        running = {tr.session_id: (cyc, tr) for cyc, tr in trackers.items() if tr.running}
+        for sid, _, _ in list(self.active):
+            if sid not in running:
+                self._remove_active(sid)
+        known = {sid for sid, _, _ in self.active}
+        now = time.time()
+        for i, (sid, cyc, cells) in enumerate(self.active):
+            new = self._format_active(cyc, running[sid][1], now)
+            changed = [c for c in range(len(HEADERS)) if new[c] != cells[c]]
+            if changed:
+                self.active[i] = (sid, cyc, new)
+                row = len(self.finished) + i
+                self.dataChanged.emit(self.index(row, changed[0]), self.index(row, changed[-1]),
+                                      [Qt.DisplayRole])
+        for sid, (cyc, tr) in running.items():
+            if sid not in known:
+                row = self.rowCount()
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.active.append((sid, cyc, self._format_active(cyc, tr, now)))
+                self.endInsertRows()
+
+    def _remove_active(self, sid):
+        for i, (asid, _, _) in enumerate(self.active):
+            if asid == sid:
+                row = len(self.finished) + i
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.active[i]
+                self.endRemoveRows()
+                return
+
+    @staticmethod
+    def _format_finished(log):
+        return [
+            log['cycle'], log['student'], _clock(log['start']), _clock(log['end']),
+            f"{int(log['duration'])}s", f"{log['kwh']:.4f}",
+        ]
+
+    @staticmethod
+    def _format_active(cyc, tr, now):
+        return [
+            cyc, tr.current_student, _clock(tr.start_time), "",
+            f"{int(now - tr.start_time)}s", f"{tr.energy_kwh:.4f}",
+        ]
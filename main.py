@@ -1,10 +1,18 @@
 # bike_energy_app/main.py
+from startup import STARTUP
 from PyQt5.QtWidgets import QApplication
 import sys
+STARTUP.mark("qt")
 from ui import EnergyApp
+STARTUP.mark("imports")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    STARTUP.mark("qapp")
     window = EnergyApp()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    STARTUP.mark("show")
+    print(STARTUP.report())
+    if not window.engine.restored_msg:
+        window.status.showMessage(STARTUP.report(), 10000)
+    sys.exit(app.exec_())
@@ -0,0 +1,179 @@
+# persistence.py
+import queue
+import sqlite3
+import threading
+import time
+from session_store import append_xlsx
+from metrics import REGISTRY
+
+_STOP = object()
+
+
+class PersistenceWorker(threading.Thread):
+    """Write-behind queue between SessionTracker.stop and the session store.
+
+    append() only enqueues, so Stop never touches the disk on the GUI
+    thread (and never waits, even when the queue is full). The worker
+    drains the queue in batches (a burst of simultaneous Stops becomes one
+    transaction), retries while the store or log.xlsx is locked, keeps
+    sessions it could not store for the next pass, and flushes whatever is
+    left on close().
+    """
+
+    def __init__(self, store, xlsx_path=None, maxsize=1000, batch_window=0.2,
+                 retry_max=10.0, on_stored=None):
+        super().__init__(name="persistence", daemon=True)
+        self.store = store
+        self.xlsx_path = xlsx_path      # mirror sessions into log.xlsx too, if set
+        self.xlsx_lock = threading.Lock()  # held by anything else rewriting log.xlsx
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_window = batch_window
+        self.retry_max = retry_max
+        self.on_stored = on_stored      # called with the batch size after each store commit
+        self._pending_store = []        # not yet stored (the store kept failing)
+        self._pending_xlsx = []         # stored but not yet mirrored (file was locked)
+        self._overflow = []             # appended while the queue was full
+        self._overflow_lock = threading.Lock()
+        self._closing = False
+        # metrics
+        self.flushed = 0
+        self.flushes = 0
+        self.retries = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.flush_hist = REGISTRY.histogram("persistence_flush_seconds", "Session store flush time")
+        self.depth = REGISTRY.gauge("persistence_queue_depth", "Completed sessions waiting to be saved")
+
+    def append(self, record):
+        """Queue a completed session; never blocks the caller."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._overflow_lock:
+                if not self._overflow:
+                    print(f"[WARN] persistence queue full ({self.queue.maxsize}); holding sessions in memory")
+                self._overflow.append(record)
+        self.depth.set(self.queue.qsize())
+
+    def close(self, timeout=10.0):
+        """Flush everything still queued and stop the worker."""
+        self.queue.put(_STOP)
+        self.join(timeout)
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue.qsize() + len(self._overflow),
+            'pending_store': len(self._pending_store),
+            'pending_xlsx': len(self._pending_xlsx),
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'retries': self.retries,
+            'last_flush_ms': self.last_flush_ms,
+            'max_flush_ms': self.max_flush_ms,
+        }
+
+    def _take_overflow(self):
+        with self._overflow_lock:
+            items, self._overflow = self._overflow, []
+        return items
+
+    def _next_batch(self):
+        # wait for the first record, or wake up to retry what is still pending
+        pending = self._pending_store or self._pending_xlsx or self._overflow
+        try:
+            first = self.queue.get(timeout=1.0 if pending else None)
+        except queue.Empty:
+            return self._take_overflow()
+        if first is _STOP:
+            self._closing = True
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while not self._closing:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._closing = True
+            else:
+                batch.append(item)
+        return batch + self._take_overflow()
+
+    def _retry(self, fn, *args):
+        """fn(*args), retried for up to retry_max seconds while the database is locked."""
+        delay = 0.1
+        give_up = time.monotonic() + self.retry_max
+        while True:
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                # anything but a busy database (disk I/O error, malformed file..) won't fix itself
+                busy = "locked" in str(e) or "busy" in str(e)
+                if not busy or time.monotonic() + delay > give_up:
+                    raise
+                self.retries += 1
+                print(f"[WARN] {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, self.retry_max)
+
+    def _flush(self, batch):
+        t0 = time.perf_counter()
+        batch = self._pending_store + batch
+        if batch:
+            try:
+                self._retry(self.store.append_many, batch)
+            except Exception as e:
+                # keep them and try again on the next pass; the worker carries on
+                if not self._pending_store:
+                    print(f"[ERROR] Failed to persist {len(batch)} session(s): {e}; will keep retrying")
+                self._pending_store = batch
+                self.retries += 1
+                return
+            self._pending_store = []
+            self.flushed += len(batch)
+            if self.on_stored is not None:
+                self.on_stored(len(batch))
+            if self.xlsx_path:
+                self._pending_xlsx.extend(batch)
+        if self._pending_xlsx:
+            try:
+                with self.xlsx_lock:
+                    append_xlsx(self.xlsx_path, self._pending_xlsx)
+                self._pending_xlsx = []
+            except PermissionError:
+                # log.xlsx is open in Excel; the sessions are safe in the
+                # store, mirror them on the next pass
+                self.retries += 1
+            except Exception as e:
+                # e.g. a corrupt log.xlsx: retrying won't help, and the sessions are stored
+                print(f"[ERROR] Failed to mirror {len(self._pending_xlsx)} session(s) to "
+                      f"{self.xlsx_path}: {e}; re-export it from Settings")
+                self._pending_xlsx = []
+        self.flushes += 1
+        self.depth.set(self.queue.qsize())
+        self.flush_hist.observe(time.perf_counter() - t0)
+        self.last_flush_ms = (time.perf_counter() - t0) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+
+    def run(self):
+        while True:
+            batch = self._next_batch()
+            if batch or self._pending_store or self._pending_xlsx:
+                self._flush(batch)
+            if self._closing:
+                # drain anything queued behind the stop marker
+                rest = []
+                while not self.queue.empty():
+                    item = self.queue.get_nowait()
+                    if item is not _STOP:
+                        rest.append(item)
+                rest += self._take_overflow()
+                if rest or self._pending_store:
+                    self._flush(rest)
+                if self._pending_store:
+                    print(f"[ERROR] {len(self._pending_store)} session(s) could not be saved to the store")
+                if self._pending_xlsx:
+                    print(f"[WARN] {len(self._pending_xlsx)} session(s) not mirrored to "
+                          f"{self.xlsx_path}; re-export it from Settings")
+                return
@@ -0,0 +1,88 @@
+# power_chart.py
+import time
+from PyQt5.QtWidgets import QWidget, QGridLayout, QSizePolicy
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+from power_history import min_max_decimate
+
+LINE_PEN = QPen(QColor('#00796b'), 1.5)
+GRID_PEN = QPen(QColor(0, 77, 64, 60), 1, Qt.DashLine)
+
+
+class PowerChart(QWidget):
+    """Power curve of one running session, drawn straight with QPainter.
+
+    The series is min/max-decimated to one pair of points per two pixel
+    columns before drawing, so paint time depends on the widget width only.
+    """
+
+    def __init__(self, history, cycle, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.cycle = cycle
+        self.student = ""
+        self.since = None
+        self.setMinimumSize(220, 120)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_session(self, student, since):
+        self.student, self.since = student, since
+        self.update()
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.fillRect(self.rect(), QColor(255, 255, 255, 204))
+        plot = QRectF(self.rect()).adjusted(6, 22, -6, -6)
+        t, w = self.history.series(self.cycle, self.since)
+        now = w[-1] if len(w) else 0.0
+        p.setPen(QColor('#004d40'))
+        p.drawText(QRectF(self.rect()).adjusted(6, 2, -6, 0), Qt.AlignLeft | Qt.AlignTop,
+                   f"{self.cycle}: {self.student}")
+        p.drawText(QRectF(self.rect()).adjusted(6, 2, -6, 0), Qt.AlignRight | Qt.AlignTop,
+                   f"{now:.0f} W")
+        if len(t) < 2:
+            return
+        t, w = min_max_decimate(t, w, max(1, int(plot.width()) // 2))
+        t0, span = self.since or t[0], max(time.time() - (self.since or t[0]), 1.0)
+        top = max(50.0, float(w.max()) * 1.1)
+        p.setPen(GRID_PEN)
+        for frac in (0.25, 0.5, 0.75):
+            y = plot.bottom() - frac * plot.height()
+            p.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+        xs = plot.left() + (t - t0) / span * plot.width()
+        ys = plot.bottom() - w / top * plot.height()
+        p.setPen(LINE_PEN)
+        p.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())]))
+
+
+class PowerChartPanel(QWidget):
+    """Grid with one PowerChart per running tracker; hidden when none run."""
+
+    def __init__(self, history, columns=4, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.columns = columns
+        self.charts = {}          # cycle -> PowerChart
+        self.grid = QGridLayout(self)
+        self.grid.setContentsMargins(0, 0, 0, 0)
+        self.setMinimumHeight(130)
+        self.hide()
+
+    def refresh(self, trackers):
+        running = [cyc for cyc, tr in trackers.items() if tr.running]
+        if running != list(self.charts):
+            for chart in self.charts.values():
+                self.grid.removeWidget(chart)
+                chart.deleteLater()
+            self.charts = {}
+            for n, cyc in enumerate(running):
+                chart = self.charts[cyc] = PowerChart(self.history, cyc, self)
+                self.grid.addWidget(chart, n // self.columns, n % self.columns)
+            self.setVisible(bool(running))
+        for cyc, chart in self.charts.items():
+            tr = trackers[cyc]
+            if (chart.student, chart.since) != (tr.current_student, tr.start_time):
+                chart.set_session(tr.current_student, tr.start_time)
+            else:
+                chart.update()
@@ -0,0 +1,57 @@
+# power_history.py
+import numpy as np
+
+
+class PowerHistory:
+    """Fixed-size ring buffer of per-bike power, one row per ingested frame.
+
+    Every sample is written twice, at i and i + capacity, so the newest
+    `capacity` rows are always one contiguous slice: reading a window never
+    copies or re-orders anything.
+    """
+
+    def __init__(self, names, capacity=36000):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.capacity = capacity
+        self.t = np.zeros(2 * capacity)
+        self.p = np.zeros((2 * capacity, len(self.names)), dtype=np.float32)
+        self.count = 0   # samples ever appended
+
+    def append(self, t, power):
+        i = self.count % self.capacity
+        self.t[i] = self.t[i + self.capacity] = t
+        self.p[i] = self.p[i + self.capacity] = power
+        self.count += 1
+
+    def series(self, name, since=None):
+        """(times, watts) views for one bike, oldest first, optionally from `since`."""
+        n = min(self.count, self.capacity)
+        lo = (self.count - n) % self.capacity if self.count > self.capacity else 0
+        t = self.t[lo:lo + n]
+        p = self.p[lo:lo + n, self.index[name]]
+        if since is not None:
+            start = int(np.searchsorted(t, since))
+            t, p = t[start:], p[start:]
+        return t, p
+
+
+def min_max_decimate(t, y, bins):
+    """Reduce (t, y) to at most ~2 * bins points keeping each bin's min and max.
+
+    Peaks survive however many samples fall into one pixel column, so the
+    drawn curve looks like the full-resolution one at a fixed cost.
+    """
+    n = len(y)
+    if n <= 2 * bins:
+        return t, y
+    k = n // bins
+    body = y[:bins * k].reshape(bins, k)
+    offsets = np.arange(bins) * k
+    i_min = body.argmin(axis=1) + offsets
+    i_max = body.argmax(axis=1) + offsets
+    idx = np.empty(2 * bins + 1, dtype=np.intp)
+    idx[0:-1:2] = np.minimum(i_min, i_max)   # keep each pair in time order
+    idx[1:-1:2] = np.maximum(i_min, i_max)
+    idx[-1] = n - 1                          # the leftover tail ends at the newest sample
+    return t[idx], y[idx]
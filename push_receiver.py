@@ -0,0 +1,119 @@
+# push_receiver.py
+from PyQt5.QtCore import QObject, pyqtSignal
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import socket
+import time
+from frames import MAGIC, decode_frame, to_channels
+from metrics import REGISTRY
+
+
+def parse_payload(payload, received, namespaced=False):
+    """Decode one pushed JSON or binary payload into a WifiPoller-shaped frame.
+
+    JSON payloads look like the board's GET response plus, when several
+    boards are configured, a "board" id ({"board": "B2", "channels": [...]});
+    binary payloads use the frames.py layout.
+    """
+    if payload[:2] == MAGIC:
+        board, voltages = decode_frame(payload)
+        channels = to_channels(board, voltages, namespaced)
+    else:
+        data = json.loads(payload)
+        channels = data['channels']
+        if namespaced:
+            # with several boards a bare "C1" matches no bike
+            if 'board' not in data:
+                raise ValueError("JSON frame without \"board\" (several boards are configured)")
+            channels = [{'channel': f"{data['board']}:{ch['channel']}", 'voltage': ch['voltage']}
+                        for ch in channels]
+    return {'timestamp': received, 'channels': channels}
+
+
+class UdpReceiver(QObject):
+    """Receives frames that boards push as UDP datagrams (one frame each)."""
+    data_received = pyqtSignal(dict)
+
+    def __init__(self, host="0.0.0.0", port=5005, namespaced=False, parent=None):
+        super().__init__(parent)
+        self.host = host
+        self.port = port
+        self.namespaced = namespaced
+        self._running = True
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.settimeout(0.5)  # wake up now and then to notice stop()
+        bad = REGISTRY.counter("frame_errors_total", "Frames that failed to decode", transport="udp")
+        try:
+            while self._running:
+                try:
+                    payload, addr = sock.recvfrom(4096)
+                except socket.timeout:
+                    continue
+                try:
+                    self.data_received.emit(parse_payload(payload, time.time(), self.namespaced))
+                except (ValueError, KeyError, TypeError) as e:
+                    bad.inc()
+                    print(f"Error: bad frame from {addr[0]}: {e}")
+        finally:
+            sock.close()
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # boards may keep the connection open between posts
+
+    def do_POST(self):
+        received = time.time()
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length)
+        try:
+            frame = parse_payload(payload, received, self.server.receiver.namespaced)
+        except (ValueError, KeyError, TypeError) as e:
+            REGISTRY.counter("frame_errors_total", "Frames that failed to decode", transport="http").inc()
+            self.send_response(400)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            print(f"Error: bad frame from {self.client_address[0]}: {e}")
+            return
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.server.receiver.data_received.emit(frame)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpPushReceiver(QObject):
+    """Accepts frames that boards POST to http://<pc>:<port>/."""
+    data_received = pyqtSignal(dict)
+
+    def __init__(self, host="0.0.0.0", port=5005, namespaced=False, parent=None):
+        super().__init__(parent)
+        self.host = host
+        self.port = port
+        self.namespaced = namespaced
+        self._server = None
+        self._running = True
+
+    def stop(self):
+        self._running = False
+        if self._server is not None:
+            self._server.shutdown()
+
+    def run(self):
+        if not self._running:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), _PushHandler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._server.server_close()
@@ -0,0 +1,70 @@
+# push_sender.py
+"""Stand-in for an ESP board in push mode: sends synthetic voltages to the PC.
+
+    python push_sender.py --udp 127.0.0.1 5005 --rate 20 --bikes 8 --binary
+    python push_sender.py --http 127.0.0.1 5005 --board 2
+    python push_sender.py --serial /dev/pts/5 --rate 100   (always binary)
+"""
+import argparse
+import json
+import math
+import random
+import socket
+import time
+import requests
+from frames import encode_frame
+
+
+def voltages(bikes, t):
+    return [max(0.0, 12 + 6 * math.sin(t / 3 + i) + random.uniform(-0.5, 0.5)) for i in range(bikes)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    mode = ap.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--udp", nargs=2, metavar=("HOST", "PORT"))
+    mode.add_argument("--http", nargs=2, metavar=("HOST", "PORT"))
+    mode.add_argument("--serial", metavar="DEVICE", help="write binary frames to a serial port / pty")
+    ap.add_argument("--rate", type=float, default=20.0, help="frames per second")
+    ap.add_argument("--bikes", type=int, default=8)
+    ap.add_argument("--board", type=int, default=1)
+    ap.add_argument("--binary", action="store_true", help="send frames.py binary frames instead of JSON")
+    args = ap.parse_args()
+
+    if args.serial:
+        import serial
+        ser = serial.Serial(args.serial, 115200)
+        args.binary = True
+    else:
+        host, port = args.udp or args.http
+        target = (host, int(port))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if args.udp else None
+    session = requests.Session() if args.http else None
+
+    period = 1.0 / args.rate
+    next_tick = time.monotonic()
+    sent = 0
+    while True:
+        volts = voltages(args.bikes, time.time())
+        if args.binary:
+            payload = encode_frame(args.board, volts)
+        else:
+            payload = json.dumps({
+                'board': f"B{args.board}",
+                'channels': [{'channel': f"C{i + 1}", 'voltage': round(v, 2)} for i, v in enumerate(volts)],
+            }).encode()
+        if args.serial:
+            ser.write(payload)
+        elif sock:
+            sock.sendto(payload, target)
+        else:
+            session.post(f"http://{host}:{port}/", data=payload, timeout=1)
+        sent += 1
+        if sent % int(args.rate * 5 or 1) == 0:
+            print(f"sent {sent} frames")
+        next_tick += period
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+
+
+if __name__ == "__main__":
+    main()
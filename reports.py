@@ -0,0 +1,238 @@
+# reports.py
+"""End-of-term report workbooks, written by worker processes.
+
+Two reports, each built by its own process so the GUI never waits:
+
+- "students": per-student totals, per-student-per-day totals and every session
+- "classes":  per-class totals and per-class-per-day totals, using an
+  optional "Class" column in config.xlsx (students without one are
+  "Unassigned")
+
+Sessions are streamed a month at a time from archive.SessionArchive.query()
+into XlsxWriter in constant_memory mode, so memory stays flat however long
+the history is; only the per-day totals are held until the end.
+
+    python reports.py [--from 2025-01-06] [--to 2025-04-04] [--out reports]
+"""
+import multiprocessing
+import os
+import queue
+import time
+from datetime import date, datetime, timedelta
+
+REPORT_KINDS = ("students", "classes")
+REPORTS_DIR = "reports"
+CANCEL_EVERY = 5000   # sessions between checks of the cancel event
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _months(archive, first_day, last_day):
+    """(first, last) day of every month holding sessions in the range, oldest first."""
+    months = set(archive.partitions(first_day, last_day, below=archive.cutoff))
+    for day in archive.store.days():
+        if (first_day is None or day >= first_day) and (last_day is None or day <= last_day):
+            months.add(day[:7])
+    out = []
+    for month in sorted(months):
+        first = date.fromisoformat(month + "-01")
+        last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        out.append((max(first.isoformat(), first_day or ""), min(last.isoformat(), last_day or "9999")))
+    return out
+
+
+def _bump(table, key, kwh, duration):
+    tot = table.get(key)
+    if tot is None:
+        table[key] = [1, kwh, duration]
+    else:
+        tot[0] += 1
+        tot[1] += kwh
+        tot[2] += duration
+
+
+def _write_totals(ws, row, header, totals, fmt):
+    ws.write_row(row, 0, header, fmt['head'])
+    for key, (n, kwh, duration) in sorted(totals.items()):
+        row += 1
+        key = key if isinstance(key, tuple) else (key,)
+        ws.write_row(row, 0, key)
+        ws.write_number(row, len(key), n)
+        ws.write_number(row, len(key) + 1, kwh, fmt['kwh'])
+        ws.write_number(row, len(key) + 2, duration / 60.0, fmt['min'])
+    return row
+
+
+def build_report(kind, out_path, store_path, archive_dir, config_path,
+                 first_day=None, last_day=None, progress=None, cancel=None):
+    """Write one report workbook; returns the number of sessions in it.
+
+    `progress` (a queue) receives (kind, fraction) after each month;
+    `cancel` (an event) aborts within CANCEL_EVERY sessions and removes the
+    partial file.
+    """
+    import xlsxwriter
+    from session_store import SessionStore
+    from archive import SessionArchive
+    from roster import read_xlsx_classes
+
+    store = SessionStore(store_path)
+    archive = SessionArchive(store, archive_dir)
+    classes = read_xlsx_classes(config_path) if kind == "classes" else {}
+    book = xlsxwriter.Workbook(out_path, {'constant_memory': True})
+    fmt = {
+        'head': book.add_format({'bold': True, 'bg_color': '#004d40', 'font_color': 'white'}),
+        'kwh': book.add_format({'num_format': '0.0000'}),
+        'min': book.add_format({'num_format': '0.0'}),
+        'time': book.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'}),
+    }
+    # summary tabs first in the workbook, but written last
+    totals_ws = book.add_worksheet("Totals")
+    daily_ws = book.add_worksheet("Per day")
+    sessions_ws = book.add_worksheet("Sessions") if kind == "students" else None
+    totals, daily = {}, {}
+    count = 0
+    try:
+        if sessions_ws is not None:
+            sessions_ws.write_row(0, 0, ["Student", "Cycle", "Start", "End", "Duration (s)",
+                                         "Avg Power (W)", "Energy (kWh)"], fmt['head'])
+        months = _months(archive, first_day, last_day)
+        for i, (lo, hi) in enumerate(months):
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            for _, day, student, cycle, start, end, duration, avg_power, kwh in archive.query(lo, hi):
+                count += 1
+                if cancel is not None and count % CANCEL_EVERY == 0 and cancel.is_set():
+                    raise Cancelled()
+                key = student if kind == "students" else classes.get(student) or "Unassigned"
+                _bump(totals, key, kwh, duration)
+                _bump(daily, (key, day), kwh, duration)
+                if sessions_ws is not None:
+                    sessions_ws.write_row(count, 0, [student, cycle])
+                    sessions_ws.write_datetime(count, 2, datetime.fromtimestamp(start), fmt['time'])
+                    sessions_ws.write_datetime(count, 3, datetime.fromtimestamp(end), fmt['time'])
+                    sessions_ws.write_number(count, 4, duration)
+                    if avg_power is not None:
+                        sessions_ws.write_number(count, 5, avg_power)
+                    sessions_ws.write_number(count, 6, kwh, fmt['kwh'])
+            if progress is not None:
+                progress.put((kind, (i + 1) / len(months)))
+        label = "Student" if kind == "students" else "Class"
+        _write_totals(totals_ws, 0, [label, "Sessions", "Energy (kWh)", "Minutes"], totals, fmt)
+        _write_totals(daily_ws, 0, [label, "Day", "Sessions", "Energy (kWh)", "Minutes"], daily, fmt)
+        book.close()
+    except BaseException:
+        try:
+            book.close()
+        finally:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+        raise
+    finally:
+        store.close()
+    if progress is not None:
+        progress.put((kind, 1.0))
+    return count
+
+
+def _worker(kind, out_path, store_path, archive_dir, config_path, first_day, last_day, progress, cancel):
+    try:
+        n = build_report(kind, out_path, store_path, archive_dir, config_path,
+                         first_day, last_day, progress, cancel)
+        progress.put((kind, 'done', n))
+    except Cancelled:
+        progress.put((kind, 'cancelled', None))
+    except Exception as e:
+        progress.put((kind, 'error', str(e)))
+
+
+class ReportJob:
+    """Runs each report in its own process; poll() returns progress messages.
+
+    Messages are (kind, fraction) while running and (kind, 'done', sessions),
+    (kind, 'cancelled', None) or (kind, 'error', message) at the end.
+    """
+
+    def __init__(self, kinds=REPORT_KINDS, out_dir=REPORTS_DIR, store_path="sessions.db",
+                 archive_dir="archive", config_path="config.xlsx", first_day=None, last_day=None):
+        os.makedirs(out_dir, exist_ok=True)
+        ctx = multiprocessing.get_context("spawn")   # same behaviour on Windows and Linux
+        self.progress = ctx.Queue()
+        self.cancel_event = ctx.Event()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.paths = {kind: os.path.join(out_dir, f"{kind}-{stamp}.xlsx") for kind in kinds}
+        self.fraction = {kind: 0.0 for kind in kinds}
+        self.results = {}
+        self.procs = [ctx.Process(
+            target=_worker, name=f"report-{kind}", daemon=True,
+            args=(kind, self.paths[kind], store_path, archive_dir, config_path,
+                  first_day, last_day, self.progress, self.cancel_event),
+        ) for kind in kinds]
+        for p in self.procs:
+            p.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def shutdown(self, timeout=5.0):
+        """Cancel, wait for the workers, and remove every report that didn't finish."""
+        self.cancel()
+        deadline = time.monotonic() + timeout
+        for p in self.procs:
+            p.join(max(0.0, deadline - time.monotonic()))
+        for p in self.procs:
+            if p.is_alive():
+                p.terminate()   # its own cleanup won't run, hence the removal below
+        for p in self.procs:
+            p.join(1.0)
+        self.poll()
+        for kind, path in self.paths.items():
+            if self.results.get(kind, ('',))[0] != 'done' and os.path.exists(path):
+                os.remove(path)
+
+    def poll(self):
+        """Drain progress messages; returns the overall fraction done (0..1)."""
+        while True:
+            try:
+                msg = self.progress.get_nowait()
+            except queue.Empty:
+                break
+            if len(msg) == 2:
+                self.fraction[msg[0]] = msg[1]
+            else:
+                self.results[msg[0]] = msg[1:]
+                self.fraction[msg[0]] = 1.0
+        for kind, p in zip(self.fraction, self.procs):
+            if kind not in self.results and not p.is_alive() and p.exitcode:
+                self.results[kind] = ('error', f"worker exited with code {p.exitcode}")
+        return sum(self.fraction.values()) / len(self.fraction)
+
+    @property
+    def done(self):
+        return len(self.results) == len(self.procs)
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--from", dest="first_day")
+    ap.add_argument("--to", dest="last_day")
+    ap.add_argument("--out", default=REPORTS_DIR)
+    ap.add_argument("--only", choices=REPORT_KINDS, action="append")
+    args = ap.parse_args()
+    job = ReportJob(args.only or REPORT_KINDS, args.out, first_day=args.first_day, last_day=args.last_day)
+    try:
+        while not job.done:
+            print(f"\r{job.poll() * 100:5.1f}%", end="", flush=True)
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        job.shutdown()
+    print()
+    for kind, (status, detail) in job.results.items():
+        print(f"{kind}: {status} {job.paths[kind] if status == 'done' else ''} {detail or ''}")
+
+
+if __name__ == "__main__":
+    main()
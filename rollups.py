@@ -0,0 +1,100 @@
+# rollups.py
+import heapq
+from datetime import date, timedelta
+
+WINDOWS = ["today", "week", "month", "all"]
+
+
+class RollupIndex:
+    """Running totals per student, per day and per bike.
+
+    add() folds one completed session into every rollup in O(1). Window
+    queries merge only the per-day buckets inside the window and are cached
+    until the next add(), so switching leaderboard filters costs O(result)
+    rather than a pass over the whole history.
+    """
+
+    def __init__(self):
+        self.by_student = {}          # student -> [kwh, sessions]
+        self.by_bike = {}             # cycle -> [kwh, sessions]
+        self.by_day = {}              # "YYYY-MM-DD" -> {student: [kwh, sessions]}
+        self.by_day_bike = {}         # "YYYY-MM-DD" -> {cycle: [kwh, sessions]}
+        self.sessions_by_student = {}  # student -> [(cycle, start_ts, end_ts, duration, kwh)]
+        self._cache = {}
+
+    @staticmethod
+    def _bump(table, key, kwh):
+        tot = table.get(key)
+        if tot is None:
+            table[key] = [kwh, 1]
+        else:
+            tot[0] += kwh
+            tot[1] += 1
+
+    def add(self, day, student, cycle, start_ts, end_ts, duration, kwh):
+        kwh = kwh or 0.0
+        self._bump(self.by_student, student, kwh)
+        self._bump(self.by_bike, cycle, kwh)
+        self._bump(self.by_day.setdefault(day, {}), student, kwh)
+        self._bump(self.by_day_bike.setdefault(day, {}), cycle, kwh)
+        self.sessions_by_student.setdefault(student, []).append((cycle, start_ts, end_ts, duration, kwh))
+        self._cache.clear()
+
+    def add_totals(self, by_student, by_bike):
+        """Fold pre-aggregated {name: [kwh, sessions]} totals into the all-time rollups.
+
+        Used for archived history, which is older than every windowed view.
+        """
+        for table, totals in ((self.by_student, by_student), (self.by_bike, by_bike)):
+            for name, (kwh, n) in totals.items():
+                tot = table.setdefault(name, [0.0, 0])
+                tot[0] += kwh
+                tot[1] += n
+        self._cache.clear()
+
+    def students(self):
+        return sorted(self.by_student)
+
+    def window_days(self, window, today=None):
+        """Day keys covered by `window` ("today", "week", "month"); None for "all"."""
+        today = today or date.today()
+        if window == "today":
+            first = today
+        elif window == "week":
+            first = today - timedelta(days=today.weekday())   # since Monday
+        elif window == "month":
+            first = today.replace(day=1)
+        else:
+            return None
+        return [(first + timedelta(days=i)).isoformat() for i in range((today - first).days + 1)]
+
+    def totals(self, window="all", by="student", today=None):
+        """{student (or cycle): [kwh, sessions]} for the window."""
+        today = today or date.today()
+        key = (window, by, today)   # the day too: "today" moves on at midnight
+        if key in self._cache:
+            return self._cache[key]
+        days = self.window_days(window, today)
+        if days is None:
+            result = self.by_student if by == "student" else self.by_bike
+        else:
+            per_day = self.by_day if by == "student" else self.by_day_bike
+            result = {}
+            for d in days:
+                for name, (kwh, n) in per_day.get(d, {}).items():
+                    tot = result.setdefault(name, [0.0, 0])
+                    tot[0] += kwh
+                    tot[1] += n
+        self._cache[key] = result
+        return result
+
+    def top(self, n=None, window="all", by="student", today=None):
+        """[(name, kwh, sessions)] ranked by energy, best first."""
+        totals = self.totals(window, by, today)
+        items = ((name, kwh, sessions) for name, (kwh, sessions) in totals.items())
+        if n is None:
+            return sorted(items, key=lambda r: r[1], reverse=True)
+        return heapq.nlargest(n, items, key=lambda r: r[1])
+
+    def sessions(self, student):
+        return self.sessions_by_student.get(student, [])
@@ -0,0 +1,275 @@
+# roster.py
+"""Student roster from config.xlsx, through a small JSON cache.
+
+Parsing the workbook needs openpyxl and takes a noticeable part of a cold
+start on slow PCs, so the names are also kept in config.cache.json along
+with the workbook's size and mtime. The workbook is only parsed again
+when it has changed (for example after being edited in Excel).
+
+Adding or removing a student appends one line to config.journal instead of
+rewriting the workbook; the journal is folded into config.xlsx when it
+gets long and when the app closes (RosterStore).
+"""
+import bisect
+import difflib
+import json
+import os
+
+CONFIG_PATH = "config.xlsx"
+CACHE_PATH = "config.cache.json"
+ROSTER_JOURNAL_PATH = "config.journal"
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def read_xlsx_names(path=CONFIG_PATH):
+    """The 'Name' column of the first sheet, in order."""
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        if 'Name' not in header:
+            return []
+        col = header.index('Name')
+        return [str(r[col]) for r in rows if col < len(r) and r[col] not in (None, "")]
+    finally:
+        wb.close()
+
+
+def read_xlsx_classes(path=CONFIG_PATH):
+    """{name: class} from an optional 'Class' column (empty if there is none)."""
+    from openpyxl import load_workbook
+    if not os.path.exists(path):
+        return {}
+    wb = load_workbook(path, read_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        if 'Name' not in header or 'Class' not in header:
+            return {}
+        name, cls = header.index('Name'), header.index('Class')
+        return {str(r[name]): str(r[cls]) for r in rows
+                if max(name, cls) < len(r) and r[name] not in (None, "") and r[cls] not in (None, "")}
+    finally:
+        wb.close()
+
+
+def load_roster(path=CONFIG_PATH, cache_path=CACHE_PATH):
+    """Names from the cache if it matches `path`, else from the workbook."""
+    if not os.path.exists(path):
+        return []
+    stamp = _stamp(path)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get('source') == stamp:
+            return cache['names']
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        names = read_xlsx_names(path)
+    except Exception as e:
+        print(f"[ERROR] Failed to read {path}: {e}")
+        return []
+    write_cache(names, path, cache_path)
+    return names
+
+
+def write_cache(names, path=CONFIG_PATH, cache_path=CACHE_PATH):
+    try:
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({'source': _stamp(path), 'names': names}, f)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        print(f"[WARN] Failed to write {cache_path}: {e}")
+
+
+def save_roster(names, path=CONFIG_PATH, cache_path=CACHE_PATH):
+    """Write the roster to the workbook and refresh the cache to match.
+
+    Only the rows of the first sheet change: a student who stays keeps the
+    whole row (Class and any other columns), a new one gets a row with just
+    the name. The header, column widths and other sheets are left alone.
+    """
+    from openpyxl import Workbook, load_workbook
+    if os.path.exists(path):
+        wb = load_workbook(path)
+        ws = wb.worksheets[0]
+    else:
+        wb = Workbook()
+        ws = wb.active
+    header = [c.value for c in ws[1]] if ws.max_row >= 1 else []
+    if 'Name' not in header:
+        if not any(v not in (None, "") for v in header):
+            header = []
+        header.append('Name')
+        ws.cell(row=1, column=len(header), value='Name')
+    col = header.index('Name')
+    rows = {}
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if col < len(row) and row[col] not in (None, ""):
+            rows.setdefault(str(row[col]), row)
+    if ws.max_row > 1:
+        ws.delete_rows(2, ws.max_row - 1)
+    for name in names:
+        ws.append(rows.get(name) or [None] * col + [name])
+    wb.save(path)
+    write_cache(list(names), path, cache_path)
+
+
+class RosterIndex:
+    """Student names with O(1) membership plus prefix and fuzzy search.
+
+    Every word of a name is kept in a sorted list, so typing "ro" finds
+    "Rohan Shah" and "Aarav Rao" by bisecting; misspellings ("rhoan") are
+    matched against the much smaller vocabulary of distinct words. add()
+    and remove() update both incrementally.
+    """
+
+    def __init__(self, names=()):
+        self.names = list(dict.fromkeys(names))   # display order
+        self._members = set(self.names)
+        self._words = []         # sorted [(word, name)]
+        self._vocab = {}         # word -> {name}
+        for name in self.names:
+            for word in set(name.casefold().split()):
+                self._words.append((word, name))
+                self._vocab.setdefault(word, set()).add(name)
+        self._words.sort()
+
+    def __contains__(self, name):
+        return name in self._members
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def add(self, name):
+        if name in self._members:
+            return False
+        self.names.append(name)
+        self._members.add(name)
+        for word in set(name.casefold().split()):
+            bisect.insort(self._words, (word, name))
+            self._vocab.setdefault(word, set()).add(name)
+        return True
+
+    def remove(self, name):
+        if name not in self._members:
+            return False
+        self.names.remove(name)
+        self._members.discard(name)
+        for word in set(name.casefold().split()):
+            del self._words[bisect.bisect_left(self._words, (word, name))]
+            self._vocab[word].discard(name)
+            if not self._vocab[word]:
+                del self._vocab[word]
+        return True
+
+    def prefix(self, text, limit=20):
+        """Names where every typed word starts a word of the name; whole-name prefixes first."""
+        words = text.casefold().split()
+        if not words:
+            return self.names[:limit]
+        found = {}
+        i = bisect.bisect_left(self._words, (words[0],))
+        while i < len(self._words) and len(found) < 4 * limit:
+            word, name = self._words[i]
+            if not word.startswith(words[0]):
+                break
+            parts = name.casefold().split()
+            if all(any(p.startswith(w) for p in parts) for w in words[1:]):
+                found[name] = not name.casefold().startswith(" ".join(words))
+            i += 1
+        return sorted(found, key=lambda n: (found[n], n.casefold()))[:limit]
+
+    def fuzzy(self, text, limit=20, cutoff=0.7):
+        """Names containing a word close to the longest typed word, best first."""
+        words = text.casefold().split()
+        if not words:
+            return []
+        found = {}
+        for word in difflib.get_close_matches(max(words, key=len), self._vocab, n=10, cutoff=cutoff):
+            for name in sorted(self._vocab[word], key=str.casefold):
+                found.setdefault(name, None)
+        return list(found)[:limit]
+
+    def search(self, text, limit=20):
+        """Prefix matches, topped up with fuzzy matches."""
+        found = self.prefix(text, limit)
+        if len(found) < limit and text.strip():
+            seen = set(found)
+            found += [n for n in self.fuzzy(text, limit) if n not in seen][:limit - len(found)]
+        return found
+
+
+class RosterStore:
+    """The roster index plus its incremental persistence.
+
+    add()/remove() append one JSON line to the journal; compact() writes the
+    whole roster to config.xlsx (and the cache) and empties the journal.
+    """
+
+    def __init__(self, path=CONFIG_PATH, cache_path=CACHE_PATH,
+                 journal_path=ROSTER_JOURNAL_PATH, compact_every=500):
+        self.path = path
+        self.cache_path = cache_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self.pending = 0
+        self.index = RosterIndex()
+
+    def load(self):
+        """(Re)build the index from the workbook/cache plus journaled edits."""
+        self.index = RosterIndex(load_roster(self.path, self.cache_path))
+        self.pending = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        ev = json.loads(line)
+                    except ValueError:
+                        break  # torn last line
+                    if ev['op'] == 'add':
+                        self.index.add(ev['name'])
+                    else:
+                        self.index.remove(ev['name'])
+                    self.pending += 1
+        return self.index
+
+    def _append(self, op, name):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({'op': op, 'name': name}) + "\n")
+        self.pending += 1
+        if self.pending >= self.compact_every:
+            self.compact()
+
+    def add(self, name):
+        if self.index.add(name):
+            self._append('add', name)
+            return True
+        return False
+
+    def remove(self, name):
+        if self.index.remove(name):
+            self._append('remove', name)
+            return True
+        return False
+
+    def compact(self):
+        if not self.pending:
+            return
+        try:
+            save_roster(self.index.names, self.path, self.cache_path)
+        except OSError as e:  # e.g. config.xlsx open in Excel: keep journaling
+            print(f"[WARN] Roster not compacted into {self.path}: {e}")
+            return
+        os.remove(self.journal_path)
+        self.pending = 0
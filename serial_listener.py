@@ -0,0 +1,60 @@
+# serial_listener.py
+from PyQt5.QtCore import QObject, pyqtSignal
+import threading
+import time
+import serial
+from frames import FrameParser, to_channels
+from metrics import REGISTRY
+
+
+class SerialPoller(QObject):
+    """Reads frames.py binary frames from a board on a USB serial port.
+
+    Bytes are read in bulk (everything the driver has buffered) and split by
+    FrameParser, which resyncs after corrupt frames. Each valid frame is
+    emitted in the same shape as WifiPoller's, stamped with its receive time.
+    """
+    data_received = pyqtSignal(dict)
+
+    def __init__(self, port, baudrate=115200, namespaced=False, backoff_max=5.0, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.baudrate = baudrate
+        self.namespaced = namespaced
+        self.backoff_max = backoff_max
+        self.parser = FrameParser()
+        self._running = True
+        self._wake = threading.Event()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def run(self):
+        bad = REGISTRY.counter("frame_errors_total", "Frames that failed to decode", transport="serial")
+        failures = 0
+        while self._running:
+            try:
+                with serial.Serial(self.port, self.baudrate, timeout=0.05) as ser:
+                    failures = 0
+                    self.parser = FrameParser()
+                    while self._running:
+                        chunk = ser.read(max(1, ser.in_waiting))
+                        if not chunk:
+                            continue
+                        received = time.time()
+                        errors = self.parser.errors
+                        frames = self.parser.feed(chunk)
+                        if self.parser.errors != errors:
+                            bad.inc(self.parser.errors - errors)
+                        for board, voltages in frames:
+                            self.data_received.emit({
+                                'timestamp': received,
+                                'channels': to_channels(board, voltages, self.namespaced),
+                            })
+            except (serial.SerialException, OSError) as e:
+                if failures == 0:
+                    print(f"Error: {e}")
+                failures += 1
+                # board unplugged or port busy: retry, backing off up to backoff_max
+                self._wake.wait(min(self.backoff_max, 0.25 * 2 ** min(failures, 8)))
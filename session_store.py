@@ -0,0 +1,296 @@
+# session_store.py
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+STORE_PATH = "sessions.db"
+
+# Column order of the per-date sheets in log.xlsx
+LOG_COLUMNS = ["Student", "Cycle", "Start", "End", "Duration (s)", "Avg Power (W)", "Energy (kWh)"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    day         TEXT NOT NULL,          -- YYYY-MM-DD of the start, the log.xlsx sheet name
+    student     TEXT NOT NULL,
+    cycle       TEXT NOT NULL,
+    start_ts    REAL NOT NULL,
+    end_ts      REAL NOT NULL,
+    duration    REAL NOT NULL,
+    avg_power   REAL,
+    energy_kwh  REAL NOT NULL,
+    station     TEXT,                   -- NULL: recorded here; else merged from that station
+    station_seq INTEGER,                -- the session's id in that station's store
+    session_id  TEXT,                   -- SessionTracker's id, so a replayed stop isn't stored twice
+    legacy_energy REAL                  -- pre-engine log.xlsx "Energy (kWh)" (total voltage / 1000); energy_kwh is 0
+);
+CREATE INDEX IF NOT EXISTS sessions_day ON sessions(day);
+CREATE INDEX IF NOT EXISTS sessions_student ON sessions(student);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# columns added after the first release, and indexes on them (created after the migration)
+ADDED_COLUMNS = [("station", "TEXT"), ("station_seq", "INTEGER"), ("session_id", "TEXT"),
+                 ("legacy_energy", "REAL")]
+ADDED_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS sessions_origin ON sessions(station, station_seq);
+CREATE UNIQUE INDEX IF NOT EXISTS sessions_session_id ON sessions(session_id);
+"""
+
+
+class SessionStore:
+    """Append-only SQLite (WAL) record of completed sessions.
+
+    Appending a session is one indexed INSERT, so stopping a ride costs the
+    same on the first day as after a whole term. log.xlsx is no longer
+    written per session; export_xlsx() regenerates it on demand.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # several processes (report workers) may open an old store at once
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+            for name, kind in ADDED_COLUMNS:
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE sessions ADD COLUMN {name} {kind}")
+            if 'legacy_energy' not in columns:
+                self._fix_legacy_energy()
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.executescript(ADDED_INDEXES)
+
+    def _fix_legacy_energy(self):
+        # stores that imported log.xlsx before legacy_energy existed: the rows
+        # recorded here before the import time are the pre-engine ones
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+        if row is None:
+            return
+        self.conn.execute(
+            "UPDATE sessions SET legacy_energy = energy_kwh, energy_kwh = 0, avg_power = NULL"
+            " WHERE station IS NULL AND session_id IS NULL AND start_ts < ?",
+            (datetime.fromisoformat(row[0]).timestamp(),))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def append(self, record):
+        return self.append_many([record])
+
+    def append_many(self, records):
+        """Insert completed sessions (dicts as returned by SessionTracker.stop).
+
+        A record whose session_id is already stored is skipped; returns how
+        many were new.
+        """
+        rows = [(
+            datetime.fromtimestamp(r['start']).strftime("%Y-%m-%d"),
+            r['student'], r['cycle'], r['start'], r['end'], r['duration'],
+            r.get('avg_power'), r['kwh'], r.get('session_id'), r.get('legacy_energy'),
+        ) for r in records]
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO sessions (day, student, cycle, start_ts, end_ts, duration,"
+                " avg_power, energy_kwh, session_id, legacy_energy) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self.conn.total_changes - before
+
+    def sessions(self, since_id=0, day=None, first_day=None, last_day=None, student=None, origin=False):
+        """Completed sessions with id > since_id, oldest first.
+
+        `day`, the inclusive `first_day`..`last_day` range and `student`
+        narrow the result through the indexes. With `origin`, rows end in
+        (station, station_seq), both None for sessions recorded here.
+        """
+        sql = ("SELECT id, day, student, cycle, start_ts, end_ts, duration, avg_power, energy_kwh"
+               + (", station, station_seq" if origin else "") + " FROM sessions WHERE id > ?")
+        args = [since_id]
+        for clause, value in (("day = ?", day), ("day >= ?", first_day),
+                              ("day <= ?", last_day), ("student = ?", student)):
+            if value is not None:
+                sql += " AND " + clause
+                args.append(value)
+        with self._lock:
+            return self.conn.execute(sql + " ORDER BY id", args).fetchall()
+
+    def local_sessions(self, since_id=0, limit=None):
+        """Sessions recorded at this station with id > since_id, oldest first."""
+        sql = ("SELECT id, day, student, cycle, start_ts, end_ts, duration, avg_power, energy_kwh"
+               " FROM sessions WHERE id > ? AND station IS NULL ORDER BY id")
+        args = [since_id]
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def merge(self, station, rows, meta=None):
+        """Import another station's sessions; returns how many were new.
+
+        `rows` have the sessions() layout with that station's own id first.
+        (station, id) is unique, so importing the same rows twice is a no-op.
+        `meta` ({key: value}) is written in the same transaction.
+        """
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO sessions (station, station_seq, day, student, cycle,"
+                " start_ts, end_ts, duration, avg_power, energy_kwh)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((station,) + tuple(row) for row in rows))
+            added = self.conn.total_changes - before
+            for key, value in (meta or {}).items():
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+        return added
+
+    def delete_before(self, day):
+        """Drop sessions from days before `day` (once archived); returns how many."""
+        with self._lock, self.conn:
+            n = self.conn.execute("DELETE FROM sessions WHERE day < ?", (day,)).rowcount
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('archived_before', ?)", (day,))
+        return n
+
+    def days(self):
+        with self._lock:
+            return [d for (d,) in self.conn.execute("SELECT DISTINCT day FROM sessions ORDER BY day")]
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def import_legacy_xlsx(self, path="log.xlsx"):
+        """One-time migration of the sessions already logged in log.xlsx.
+
+        Sheets written before the energy engine (they have a "Total Voltage"
+        column) hold total_voltage / 1000 under "Energy (kWh)", which is not
+        energy and can't be converted without the poll rate and load. Those
+        sessions are imported with 0 kWh, so they count as sessions but not
+        in any energy total, and the old figure is kept in legacy_energy.
+        """
+        if self.get_meta("legacy_imported") or not os.path.exists(path):
+            return 0
+        import pandas as pd
+        records = []
+        for day, df in pd.read_excel(path, sheet_name=None).items():
+            legacy = "Total Voltage" in df.columns
+            for rec in df.dropna(subset=["Student", "Start", "End"]).to_dict('records'):
+                try:
+                    start = datetime.fromisoformat(f"{day} {rec['Start']}").timestamp()
+                    end = datetime.fromisoformat(f"{day} {rec['End']}").timestamp()
+                except ValueError:
+                    continue
+                records.append({
+                    'student': rec['Student'], 'cycle': rec.get('Cycle', ''),
+                    'start': start, 'end': end,
+                    'duration': rec.get('Duration (s)', end - start),
+                    'avg_power': None if legacy else rec.get('Avg Power (W)'),
+                    'kwh': 0.0 if legacy else rec.get('Energy (kWh)', 0.0),
+                    'legacy_energy': rec.get('Energy (kWh)') if legacy else None,
+                })
+        self.append_many(records)
+        self.set_meta("legacy_imported", datetime.now().isoformat(timespec="seconds"))
+        return len(records)
+
+    def export_xlsx(self, path="log.xlsx", days=None):
+        """Write the per-date-sheet log.xlsx layout from the store."""
+        days = self.days() if days is None else days
+        return write_log_xlsx(path, ((day, self.sessions(day=day)) for day in days))
+
+
+def write_log_xlsx(path, days):
+    """Write [(day, session rows)] as one log.xlsx sheet per day; returns the sheet count."""
+    import pandas as pd
+    written = 0
+    writer = None
+    try:
+        for day, rows in days:
+            if writer is None:
+                writer = pd.ExcelWriter(path, engine="openpyxl", mode="w")
+            df = pd.DataFrame([{
+                "Student": student,
+                "Cycle": cycle,
+                "Start": datetime.fromtimestamp(start).time(),
+                "End": datetime.fromtimestamp(end).time(),
+                "Duration (s)": duration,
+                "Avg Power (W)": avg_power,
+                "Energy (kWh)": kwh,
+            } for _, _, student, cycle, start, end, duration, avg_power, kwh in rows],
+                columns=LOG_COLUMNS)
+            df.to_excel(writer, sheet_name=day, index=False)
+            written += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def append_xlsx(path, records):
+    """Append completed sessions to their date sheets in an existing log.xlsx.
+
+    Used to keep log.xlsx mirrored from the persistence worker; raises
+    PermissionError while the file is open in Excel.
+    """
+    from openpyxl import Workbook, load_workbook
+    if os.path.exists(path):
+        book = load_workbook(path)
+    else:
+        book = Workbook()
+        book.remove(book.active)
+    for r in records:
+        day = datetime.fromtimestamp(r['start']).strftime("%Y-%m-%d")
+        if day in book.sheetnames:
+            ws = book[day]
+        else:
+            ws = book.create_sheet(day)
+            ws.append(LOG_COLUMNS)
+        ws.append([
+            r['student'], r['cycle'],
+            datetime.fromtimestamp(r['start']).time(),
+            datetime.fromtimestamp(r['end']).time(),
+            r['duration'], r.get('avg_power'), r['kwh'],
+        ])
+    book.save(path)
+
+
+def trim_xlsx(path, before_day):
+    """Remove the date sheets older than `before_day` from log.xlsx; returns how many."""
+    from openpyxl import load_workbook
+    if not os.path.exists(path):
+        return 0
+    book = load_workbook(path)
+    old = [name for name in book.sheetnames if len(name) == 10 and name[4] == "-" and name < before_day]
+    if not old:
+        return 0
+    if len(old) == len(book.sheetnames):
+        os.remove(path)  # nothing recent left; the next mirrored session recreates it
+        return len(old)
+    for name in old:
+        book.remove(book[name])
+    book.save(path)
+    return len(old)
+
+
+if __name__ == "__main__":
+    # python session_store.py export [log.xlsx]
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        out = sys.argv[2] if len(sys.argv) > 2 else "log.xlsx"
+        n = SessionStore().export_xlsx(out)
+        print(f"Exported {n} day sheet(s) to {out}")
+    else:
+        print("usage: python session_store.py export [log.xlsx]")
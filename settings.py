@@ -0,0 +1,82 @@
+# settings.py
+import json
+import os
+
+SETTINGS_PATH = "settings.json"
+
+# Defaults used when settings.json is missing or leaves a key out.
+DEFAULTS = {
+    # One entry per ESP board; bikes on board "B2" become "B2 Cycle 1".. when
+    # more than one board is configured.
+    "boards": [
+        {"id": "B1", "url": "http://192.168.4.1/", "channels": 8},
+    ],
+    "poll_rate_hz": 10.0,        # fixed-rate schedule, typically 5-20 Hz
+    "poll_timeout_s": 0.5,       # per-request timeout
+    "backoff_max_s": 5.0,        # longest wait between retries while the board is down
+    # "poll": PC polls each board over HTTP GET; "udp" / "http": boards push
+    # frames to push_host:push_port instead; "serial": binary frames over USB.
+    "transport": "poll",
+    "push_host": "0.0.0.0",
+    "push_port": 5005,
+    "serial_port": "COM3",
+    "serial_baud": 115200,
+    # Power is V^2 / load_resistance_ohm unless a bike has its own entry in
+    # "calibration", e.g. {"Cycle 3": {"resistance": 8.2}} or
+    # {"Cycle 3": {"current_channel": "C9", "current_scale": 0.1}} for P = V * I.
+    "load_resistance_ohm": 10.0,
+    "calibration": {},
+    "max_sample_gap_s": 2.0,     # don't integrate energy across longer dropouts
+    # also keep log.xlsx updated in the background; off by default because
+    # every batch rewrites the whole workbook (export it from Settings instead)
+    "mirror_log_xlsx": False,
+    "checkpoint_interval_s": 2.0,  # how often running sessions are journaled
+    "ui_fps": 10,                # live table redraw budget, independent of the sample rate
+    "record_telemetry": True,    # keep every raw frame in telemetry/YYYY-MM-DD.bin
+    # sessions older than this move from sessions.db / log.xlsx into archive/YYYY-MM.npz
+    # (0 = never; at least 31 so every leaderboard window stays in the store)
+    "archive_keep_days": 60,
+    "chart_history_s": 3600,     # live power charts keep this much (at poll_rate_hz)
+    # Prometheus text metrics on http://127.0.0.1:<metrics_port>/metrics (0 = off)
+    # and/or rewritten to metrics_file every few seconds (None = off).
+    "metrics_port": 9108,
+    "metrics_file": None,
+    # engine.py JSON API for other displays / a headless station (0 = off in the GUI)
+    "api_host": "127.0.0.1",
+    "api_port": 8765,
+    "feed_port": 8766,           # feed.py live pub/sub for extra displays (0 = off)
+    # sync.py: with several stations at an event, each exports its sessions to
+    # sync_dir (a shared folder) and merges the others' every sync_interval_s.
+    # station_id must be unique and stable per station (None = host name).
+    "station_id": None,
+    "sync_dir": None,
+    "sync_interval_s": 300,
+}
+
+
+def load_settings(path=SETTINGS_PATH):
+    """Return DEFAULTS overlaid with whatever is in `path` (if it exists)."""
+    settings = dict(DEFAULTS)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            print(f"[ERROR] Failed to load {path}: {e}")
+    return settings
+
+
+def bike_map(boards):
+    """Map incoming channel keys to tracker names, in display order.
+
+    A single board keeps the historical "C1" -> "Cycle 1" naming; with several
+    boards the keys are namespaced ("B2:C1" -> "B2 Cycle 1").
+    """
+    mapping = {}
+    for board in boards:
+        for n in range(1, int(board.get("channels", 8)) + 1):
+            if len(boards) == 1:
+                mapping[f"C{n}"] = f"Cycle {n}"
+            else:
+                mapping[f"{board['id']}:C{n}"] = f"{board['id']} Cycle {n}"
+    return mapping
@@ -0,0 +1,159 @@
+# simulator.py
+"""Fake ESP boards for testing and load-testing without the real hardware.
+
+Serves the board's {"channels": [{"channel": "C1", "voltage": ...}]} JSON on
+one port per board, either from synthetic pedaling profiles or by replaying
+a day recorded by telemetry_recorder at 1x-100x speed.
+
+    python simulator.py --boards 4 --bikes 8                  # ports 8080-8083
+    python simulator.py --replay 2025-06-29 --speed 20
+    python simulator.py --boards 4 --write-settings           # point the app at it
+
+Point the app at it by listing the printed URLs under "boards" in
+settings.json (--write-settings does that for you).
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from settings import SETTINGS_PATH
+
+
+class PedalProfile:
+    """Synthetic generator voltage for one bike: cruising, sprints and rests."""
+
+    def __init__(self, seed):
+        rnd = random.Random(seed)
+        self.strength = rnd.uniform(8.0, 20.0)   # cruising voltage
+        self.cadence = rnd.uniform(0.8, 1.6)     # pedal strokes per second
+        self.phase = rnd.uniform(0, 2 * math.pi)
+        self.sprint_every = rnd.uniform(20, 60)  # seconds between sprints
+        self.rest_every = rnd.uniform(90, 240)   # seconds between rests
+        self.rnd = rnd
+
+    def voltage(self, t):
+        if (t % self.rest_every) < 10:
+            return 0.0
+        v = self.strength
+        if (t % self.sprint_every) < 5:
+            v *= 1.6
+        # ripple from the pedal strokes plus a little noise
+        v *= 0.85 + 0.15 * math.sin(2 * math.pi * self.cadence * t + self.phase)
+        return max(0.0, v + self.rnd.gauss(0, 0.2))
+
+
+class SyntheticBoard:
+    def __init__(self, board, bikes):
+        self.profiles = [PedalProfile(board * 1000 + i) for i in range(bikes)]
+        self.channels = bikes
+
+    def frame(self, now):
+        return {'channels': [{'channel': f"C{i + 1}", 'voltage': round(p.voltage(now), 3)}
+                             for i, p in enumerate(self.profiles)]}
+
+
+class ReplayBoard:
+    """Plays back one board's channels from a TelemetryReader, looping at the end."""
+
+    def __init__(self, reader, board_id, speed, started):
+        self.reader = reader
+        self.speed = speed
+        self.started = started
+        t = reader.t
+        self.t0, self.span = float(t[0]), max(float(t[-1] - t[0]), 1e-6)
+        prefix = f"{board_id}:"
+        # recorded keys are "C1" (single board) or "B2:C1"
+        self.columns = [(i, key[len(prefix):] if key.startswith(prefix) else key)
+                        for i, key in enumerate(reader.channels)
+                        if key.startswith(prefix) or (":" not in key and board_id == "B1")]
+        self.channels = len(self.columns)
+
+    def frame(self, now):
+        offset = ((now - self.started) * self.speed) % self.span
+        v = self.reader.at(self.t0 + offset)['v']
+        return {'channels': [{'channel': name, 'voltage': round(float(v[col]), 3)}
+                             for col, name in self.columns if not math.isnan(v[col])]}
+
+
+class _BoardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the pollers expect
+
+    def do_GET(self):
+        body = json.dumps(self.server.board.frame(time.time())).encode()
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(boards, host, port):
+    """Start one HTTP server per board on consecutive ports; returns the servers."""
+    servers = []
+    for n, board in enumerate(boards):
+        srv = ThreadingHTTPServer((host, port + n), _BoardHandler)
+        srv.daemon_threads = True
+        srv.board = board
+        srv.requests = 0
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+    return servers
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--boards", type=int, default=1)
+    ap.add_argument("--bikes", type=int, default=8, help="bikes per board")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080, help="first board's port")
+    ap.add_argument("--replay", metavar="DAY", help="replay telemetry/DAY.bin instead of synthetic data")
+    ap.add_argument("--speed", type=float, default=1.0, help="replay speed (1-100x)")
+    ap.add_argument("--write-settings", action="store_true", help=f"point {SETTINGS_PATH} at the simulator")
+    args = ap.parse_args()
+
+    ids = [f"B{n + 1}" for n in range(args.boards)]
+    if args.replay:
+        from telemetry_recorder import TelemetryReader
+        reader = TelemetryReader(args.replay)
+        started = time.time()
+        boards = [ReplayBoard(reader, b, args.speed, started) for b in ids]
+    else:
+        boards = [SyntheticBoard(n + 1, args.bikes) for n in range(args.boards)]
+    servers = serve(boards, args.host, args.port)
+
+    conf = [{'id': b, 'url': f"http://{args.host}:{args.port + n}/", 'channels': board.channels}
+            for n, (b, board) in enumerate(zip(ids, boards))]
+    for c in conf:
+        print(f"{c['id']}: {c['url']}")
+    if args.write_settings:
+        try:
+            with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+                current = json.load(f)
+        except (OSError, ValueError):
+            current = {}
+        current.update({'boards': conf, 'transport': 'poll'})
+        with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Wrote boards to {SETTINGS_PATH}")
+
+    try:
+        last = 0
+        while True:
+            time.sleep(5)
+            total = sum(s.requests for s in servers)
+            print(f"{(total - last) / 5:.1f} req/s")
+            last = total
+    except KeyboardInterrupt:
+        for s in servers:
+            s.shutdown()
+
+
+if __name__ == "__main__":
+    main()
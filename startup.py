@@ -0,0 +1,28 @@
+# startup.py
+import time
+from metrics import REGISTRY
+
+
+class StartupPhases:
+    """Wall time of each startup phase, for the console, status bar and metrics."""
+
+    def __init__(self):
+        self.t0 = self.last = time.perf_counter()
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        REGISTRY.gauge("startup_phase_seconds", "Time spent in each startup phase", phase=name).set(now - self.last)
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.t0
+
+    def report(self):
+        parts = ", ".join(f"{name} {secs * 1000:.0f}" for name, secs in self.phases)
+        return f"Started in {self.total * 1000:.0f} ms ({parts} ms)"
+
+
+STARTUP = StartupPhases()
@@ -0,0 +1,220 @@
+# sync.py
+"""Multi-station sync: combine the sessions of several kiosks.
+
+Each station numbers the sessions it records by their id in its own
+sessions.db. export() writes the ones since the last export as one delta
+file into a shared directory,
+
+    <sync_dir>/<station>/<last id, 12 digits>.json
+
+and merge() imports every other station's new delta files into the local
+store. Imported rows keep (station, id), which is unique in the store, and
+each station's highest imported id is remembered in the store's meta
+table, so running a merge twice, or over overlapping files, never counts a
+session twice. Every station that merges ends up with the combined
+sessions, and its leaderboard ranks them all. Sessions already compacted
+into the archive are still exported. Merged sessions from days
+already archived locally go on into the archive (archive.SessionArchive),
+under its lock so a running compaction can't miss them.
+
+Instead of a shared drive, a station can be pulled over the engine API
+(GET /delta?since=N):
+
+    python sync.py [--dir \\\\server\\bikes-sync]     # export, then merge
+    python sync.py --pull http://10.0.0.12:8765
+"""
+import json
+import os
+import re
+import socket
+import threading
+
+SYNC_BATCH = 50000   # sessions per delta file
+
+
+def station_name(settings):
+    """This station's ID: settings['station_id'], else the host name."""
+    name = settings.get('station_id') or socket.gethostname()
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def delta(store, station, since=0, limit=None, archive=None):
+    """Sessions recorded at this station with id > since, as a delta dict.
+
+    With `archive`, sessions compacted into it before they were exported
+    are included too.
+    """
+    if archive is None:
+        rows = store.local_sessions(since, limit)
+    else:
+        with archive.lock:   # not while compaction is moving rows
+            rows = sorted(archive.local_sessions(since, limit) + store.local_sessions(since, limit))
+        if limit is not None:
+            rows = rows[:limit]
+    return {
+        'station': station,
+        'first_seq': rows[0][0] if rows else None,
+        'last_seq': rows[-1][0] if rows else since,
+        'rows': rows,
+    }
+
+
+def apply_delta(store, payload, own_station=None, archive=None):
+    """Merge one delta dict into `store` (and `archive`); returns how many sessions were new."""
+    station = payload['station']
+    if station == own_station or not payload['rows']:
+        return 0
+    if archive is None:
+        return _apply(store, station, payload)
+    with archive.lock:
+        added = _apply(store, station, payload)
+        if added:
+            archive.archive_stragglers()
+        return added
+
+
+def _apply(store, station, payload):
+    key = f"synced:{station}"
+    seen = int(store.get_meta(key, 0))
+    rows = [row for row in payload['rows'] if row[0] > seen]
+    if not rows:
+        return 0
+    return store.merge(station, rows, {key: max(seen, payload['last_seq'])})
+
+
+def export(store, station, directory, archive=None):
+    """Write this station's sessions since the last export; returns how many."""
+    out = os.path.join(directory, station)
+    os.makedirs(out, exist_ok=True)
+    exported = 0
+    while True:
+        since = int(store.get_meta("sync_exported", 0))
+        payload = delta(store, station, since, SYNC_BATCH, archive)
+        if not payload['rows']:
+            return exported
+        path = os.path.join(out, f"{payload['last_seq']:012d}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, path)   # readers never see a half-written file
+        store.set_meta("sync_exported", payload['last_seq'])
+        exported += len(payload['rows'])
+
+
+def merge(store, directory, own_station=None, archive=None):
+    """Import every other station's new delta files; returns {station: new sessions}."""
+    added = {}
+    if not os.path.isdir(directory):
+        return added
+    for station in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, station)
+        if station == own_station or not os.path.isdir(folder):
+            continue
+        seen = int(store.get_meta(f"synced:{station}", 0))
+        # file names are the last id they hold, so old files are skipped unread
+        for name in sorted(os.listdir(folder)):
+            if not (name.endswith(".json") and name[:-5].isdigit()) or int(name[:-5]) <= seen:
+                continue
+            try:
+                with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Skipping sync file {station}/{name}: {e}")
+                continue
+            added[station] = added.get(station, 0) + apply_delta(store, payload, own_station, archive)
+    return added
+
+
+def pull(store, url, own_station=None, archive=None, timeout=30.0):
+    """Merge another station's new sessions from its engine API; returns how many."""
+    import requests
+    def get(since, limit):
+        resp = requests.get(url.rstrip("/") + "/delta",
+                            params={'since': since, 'limit': limit}, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+    station = get(0, 0)['station']   # no rows, just the station's ID
+    if station == own_station:
+        return 0
+    added = 0
+    while True:
+        payload = get(int(store.get_meta(f"synced:{station}", 0)), SYNC_BATCH)
+        added += apply_delta(store, payload, own_station, archive)
+        if len(payload['rows']) < SYNC_BATCH:
+            return added
+
+
+class StationSync:
+    """export() + merge() against settings['sync_dir'], one run at a time."""
+
+    def __init__(self, store, settings, archive=None):
+        self.store = store
+        self.archive = archive
+        self.directory = settings['sync_dir']
+        self.station = station_name(settings)
+        self._running = threading.Lock()
+
+    def run(self):
+        """Returns (exported, {station: imported}), or None if a run is already going."""
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            return export(self.store, self.station, self.directory, self.archive), merge(self.store, self.directory, self.station, self.archive)
+        finally:
+            self._running.release()
+
+    def wait(self):
+        """Block until a running sync has finished."""
+        with self._running:
+            pass
+
+    def start(self, done=None):
+        """run() on a background thread; done(result) is called from that thread."""
+        def job():
+            try:
+                result = self.run()
+            except Exception as e:
+                print(f"[ERROR] Station sync failed: {e}")
+                return
+            if result is None:
+                return
+            exported, added = result
+            if exported or any(added.values()):
+                print(f"Sync: exported {exported} session(s), imported "
+                      + (", ".join(f"{n} from {s}" for s, n in added.items()) or "none"))
+            if done is not None:
+                done(result)
+        thread = threading.Thread(target=job, name="sync", daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    import argparse
+    from session_store import SessionStore
+    from archive import SessionArchive
+    from settings import load_settings
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", help="shared sync directory (default: settings sync_dir)")
+    ap.add_argument("--pull", metavar="URL", action="append", help="merge a station over its engine API")
+    args = ap.parse_args()
+    settings = load_settings()
+    station = station_name(settings)
+    store = SessionStore()
+    archive = SessionArchive(store)
+    try:
+        for url in args.pull or []:
+            print(f"{url}: {pull(store, url, station, archive)} new session(s)")
+        directory = args.dir or settings['sync_dir']
+        if directory:
+            print(f"Exported {export(store, station, directory, archive)} session(s) as {station}")
+            for other, n in merge(store, directory, station, archive).items():
+                print(f"{other}: {n} new session(s)")
+        elif not args.pull:
+            ap.error("no sync_dir in settings.json; pass --dir or --pull")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# telemetry_recorder.py
+import bisect
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+TELEMETRY_DIR = "telemetry"
+
+
+def frame_dtype(n_channels):
+    """One fixed-width record per frame: receive time plus every channel."""
+    return np.dtype([('t', '<f8'), ('v', '<f4', (n_channels,))])
+
+
+class TelemetryRecorder(threading.Thread):
+    """Appends every telemetry frame to telemetry/YYYY-MM-DD.bin.
+
+    Each .bin file is a raw NumPy structured array (frame_dtype) with a
+    .json sidecar naming the channels, so TelemetryReader can memory-map it.
+    record() is called on the GUI thread and only enqueues; the writer
+    thread packs frames into arrays and writes them in batches, each sorted
+    by time. Channels missing from a frame are stored as NaN. A frame that
+    arrives after later ones were already written (pushed boards keep their
+    own timestamps) is still appended, and the sidecar is marked
+    "sorted": false so the reader orders the file itself.
+    """
+
+    def __init__(self, channels, directory=TELEMETRY_DIR, batch_frames=200, batch_interval=1.0):
+        super().__init__(name="telemetry", daemon=True)
+        self.channels = list(channels)
+        self.slot = {key: i for i, key in enumerate(self.channels)}
+        self.dtype = frame_dtype(len(self.channels))
+        self.directory = directory
+        self.batch_frames = batch_frames
+        self.batch_interval = batch_interval
+        self.queue = queue.Queue()
+        self.frames_written = 0
+        self._paths = {}
+        self._last_t = {}   # path -> latest time written to it
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, frame):
+        self.queue.put(frame)
+
+    def close(self):
+        self.queue.put(None)
+        self.join(5.0)
+
+    def _pack(self, frames):
+        rec = np.zeros(len(frames), dtype=self.dtype)
+        rec['v'] = np.nan
+        v = rec['v']
+        slot = self.slot
+        for row, frame in enumerate(frames):
+            rec['t'][row] = frame.get('timestamp', time.time())
+            for ch in frame['channels']:
+                i = slot.get(ch['channel'])
+                if i is not None:
+                    v[row, i] = ch['voltage']
+        return rec
+
+    def _write(self, frames):
+        rec = self._pack(frames)
+        rec = rec[np.argsort(rec['t'], kind="stable")]
+        days = np.array([datetime.fromtimestamp(t).strftime("%Y-%m-%d") for t in rec['t'][[0, -1]]])
+        if days[0] == days[1]:
+            parts = [(days[0], rec)]
+        else:  # batch spans midnight
+            labels = np.array([datetime.fromtimestamp(t).strftime("%Y-%m-%d") for t in rec['t']])
+            parts = [(d, rec[labels == d]) for d in np.unique(labels)]
+        for day, part in parts:
+            path = self._path_for(day)
+            last = self._last_t.get(path)
+            if last is not None and part['t'][0] < last:
+                self._mark_unsorted(path)
+            with open(path, "ab") as f:
+                f.write(part.tobytes())
+            self._last_t[path] = part['t'][-1] if last is None else max(last, part['t'][-1])
+        self.frames_written += len(rec)
+
+    def _path_for(self, day):
+        """telemetry/<day>.bin, or <day>.2.bin... if the channel layout changed that day."""
+        path = self._paths.get(day)
+        if path is None:
+            n = 1
+            while True:
+                name = day if n == 1 else f"{day}.{n}"
+                meta = os.path.join(self.directory, f"{name}.json")
+                if not os.path.exists(meta):
+                    with open(meta, "w", encoding="utf-8") as f:
+                        json.dump({'channels': self.channels, 'sorted': True}, f)
+                    break
+                with open(meta, "r", encoding="utf-8") as f:
+                    if json.load(f)['channels'] == self.channels:
+                        break
+                n += 1
+            path = self._paths[day] = os.path.join(self.directory, f"{name}.bin")
+            if os.path.exists(path):
+                # drop a record torn by a crash so appends stay aligned
+                size = os.path.getsize(path)
+                if size % self.dtype.itemsize:
+                    os.truncate(path, size - size % self.dtype.itemsize)
+                if size >= self.dtype.itemsize:
+                    last = np.fromfile(path, dtype=self.dtype, count=1,
+                                       offset=(size // self.dtype.itemsize - 1) * self.dtype.itemsize)
+                    self._last_t[path] = last['t'][0]
+        return path
+
+    def _mark_unsorted(self, path):
+        meta = path[:-len(".bin")] + ".json"
+        with open(meta, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get('sorted', True):
+            info['sorted'] = False
+            with open(meta, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+
+    def run(self):
+        batch = []
+        deadline = time.monotonic() + self.batch_interval
+        closing = False
+        while not closing:
+            try:
+                frame = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if frame is None:
+                    closing = True
+                else:
+                    batch.append(frame)
+            except queue.Empty:
+                pass
+            if batch and (closing or len(batch) >= self.batch_frames or time.monotonic() >= deadline):
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"[ERROR] Failed to record {len(batch)} telemetry frame(s): {e}")
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.batch_interval
+
+
+class TelemetryReader:
+    """Zero-copy access to one day's recording through np.memmap.
+
+    `name` is the file stem, normally the day ("2025-06-29"). Frames are
+    bisected by time in place; a file the recorder marked unsorted (or an
+    older one that turns out to be) gets a sorted index built once.
+    """
+
+    def __init__(self, name, directory=TELEMETRY_DIR):
+        path = os.path.join(directory, f"{name}.bin")
+        with open(os.path.join(directory, f"{name}.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.channels = meta['channels']
+        self.dtype = frame_dtype(len(self.channels))
+        count = os.path.getsize(path) // self.dtype.itemsize  # ignore a torn last record
+        if count == 0:
+            self.frames = np.zeros(0, dtype=self.dtype)
+        else:
+            self.frames = np.memmap(path, dtype=self.dtype, mode='r', shape=(count,))
+        self._order = None
+        self.t = self.frames['t']   # frame times, ascending
+        if not meta.get('sorted', bool(np.all(self.t[1:] >= self.t[:-1]))):
+            self._order = np.argsort(self.t, kind="stable")
+            self.t = self.t[self._order]
+
+    def between(self, start_ts, end_ts):
+        """Frames received in [start_ts, end_ts], in time order; a view (nothing
+        is copied) unless the file is unsorted."""
+        lo = bisect.bisect_left(self.t, start_ts)  # touches only O(log n) pages
+        hi = bisect.bisect_right(self.t, end_ts, lo)
+        if self._order is None:
+            return self.frames[lo:hi]
+        return self.frames[self._order[lo:hi]]
+
+    def at(self, ts):
+        """The first frame received at or after `ts` (the last one if none is)."""
+        i = min(bisect.bisect_left(self.t, ts), len(self.t) - 1)
+        return self.frames[i if self._order is None else self._order[i]]
+
+    def channel(self, key, start_ts=None, end_ts=None):
+        """(times, voltages) for one channel, optionally limited to a session."""
+        frames = self.frames if start_ts is None else self.between(start_ts, end_ts)
+        return frames['t'], frames['v'][:, self.channels.index(key)]
@@ -1,6 +1,9 @@
+import sys
 import requests
 
-response = requests.get("http://192.168.4.1/")
+# python testEsp.py [url]   e.g. http://127.0.0.1:8080/ for simulator.py
+url = sys.argv[1] if len(sys.argv) > 1 else "http://192.168.4.1/"
+response = requests.get(url)
 data = response.json()
 print(data)
 for channel in data["channels"]:
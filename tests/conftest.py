@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# the app is a set of top-level modules; make them importable from tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+# tests/test_energy.py
+import pytest
+from energy import EnergyEngine, J_PER_KWH
+
+
+def frame(t, **volts):
+    return {'timestamp': t, 'channels': [{'channel': ch, 'voltage': v} for ch, v in volts.items()]}
+
+
+def test_trapezoidal_integration_over_timestamps():
+    e = EnergyEngine({'C1': "Cycle 1"}, resistance=10.0)
+    e.ingest(frame(0.0, C1=10.0))      # 10 W
+    e.ingest(frame(1.0, C1=20.0))      # 40 W
+    e.ingest(frame(1.5, C1=20.0))
+    assert e.energy_j[0] == pytest.approx(0.5 * (10 + 40) * 1.0 + 40 * 0.5)
+    assert e.energy_kwh("Cycle 1") == pytest.approx(e.energy_j[0] / J_PER_KWH)
+
+
+def test_independent_of_sample_rate():
+    slow = EnergyEngine({'C1': "Cycle 1"})
+    fast = EnergyEngine({'C1': "Cycle 1"})
+    for i in range(11):
+        slow.ingest(frame(i * 1.0, C1=12.0))
+    for i in range(101):
+        fast.ingest(frame(i * 0.1, C1=12.0))
+    assert slow.energy_j[0] == pytest.approx(fast.energy_j[0])
+
+
+def test_gap_longer_than_max_gap_is_not_integrated():
+    e = EnergyEngine({'C1': "Cycle 1"}, max_gap=2.0)
+    e.ingest(frame(0.0, C1=10.0))
+    e.ingest(frame(5.0, C1=10.0))
+    assert e.energy_j[0] == 0.0
+    e.ingest(frame(6.0, C1=10.0))
+    assert e.energy_j[0] == pytest.approx(10.0)
+
+
+def test_bikes_missing_from_a_frame_are_untouched():
+    e = EnergyEngine({'C1': "Cycle 1", 'C2': "Cycle 2"})
+    e.ingest(frame(0.0, C1=10.0, C2=10.0))
+    e.ingest(frame(1.0, C1=10.0))
+    assert e.energy_j.tolist() == pytest.approx([10.0, 0.0])
+
+
+def test_current_channel_calibration():
+    e = EnergyEngine({'C1': "Cycle 1"}, calibration={"Cycle 1": {"current_channel": "C9", "current_scale": 0.5}})
+    e.ingest(frame(0.0, C1=10.0, C9=4.0))   # P = 10 * 4 * 0.5 = 20 W
+    e.ingest(frame(1.0, C1=10.0, C9=4.0))
+    assert e.power[0] == pytest.approx(20.0)
+    assert e.energy_j[0] == pytest.approx(20.0)
@@ -0,0 +1,60 @@
+# tests/test_frames.py
+import pytest
+from frames import MAGIC, FrameParser, decode_frame, encode_frame
+
+
+def frame_ending_in_magic_byte():
+    """A valid frame whose last CRC byte happens to be 0xB1."""
+    for v in range(10000):
+        frame = encode_frame(1, [float(v)])
+        if frame[-1:] == MAGIC[:1]:
+            return frame
+    raise AssertionError("no such frame")
+
+
+def test_round_trip():
+    board, voltages = decode_frame(encode_frame(3, [1.5, 12.0]))
+    assert board == 3
+    assert voltages == pytest.approx((1.5, 12.0))
+
+
+def test_decode_rejects_bad_crc():
+    frame = bytearray(encode_frame(1, [5.0]))
+    frame[-1] ^= 0xFF
+    with pytest.raises(ValueError):
+        decode_frame(bytes(frame))
+
+
+def test_split_across_feeds():
+    frame = encode_frame(1, [1.0, 2.0, 3.0])
+    p = FrameParser()
+    assert p.feed(frame[:5]) == []
+    assert p.feed(frame[5:]) == [(1, pytest.approx((1.0, 2.0, 3.0)))]
+    assert p.buf == bytearray()
+
+
+def test_resync_after_garbage_and_corrupt_frame():
+    good = encode_frame(2, [7.0])
+    bad = bytearray(good)
+    bad[-2] ^= 0xFF
+    p = FrameParser()
+    frames = p.feed(b"noise" + bytes(bad) + good)
+    assert [board for board, _ in frames] == [2]
+    assert p.errors >= 1
+    assert p.frames == 1
+
+
+def test_frame_ending_in_first_magic_byte_is_consumed_once():
+    frame = frame_ending_in_magic_byte()
+    p = FrameParser()
+    assert len(p.feed(frame)) == 1
+    assert p.skipped == 0
+    assert p.buf == bytearray()
+    assert len(p.feed(frame)) == 1
+
+
+def test_trailing_half_magic_is_kept():
+    frame = encode_frame(1, [4.0])
+    p = FrameParser()
+    assert p.feed(b"xx" + frame[:1]) == []
+    assert p.feed(frame[1:]) == [(1, pytest.approx((4.0,)))]
@@ -0,0 +1,56 @@
+# tests/test_journal.py
+import json
+from journal import SessionJournal
+from session_store import SessionStore
+
+
+def record(session_id, cycle="Cycle 1", student="Ana"):
+    return {'session_id': session_id, 'cycle': cycle, 'student': student, 'start': 1.7e9,
+            'end': 1.7e9 + 60, 'duration': 60.0, 'avg_power': 20.0, 'kwh': 0.0003}
+
+
+def write_journal(path, *lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+
+
+def test_replay_running_and_stopped(tmp_path):
+    path = tmp_path / "sessions.journal"
+    write_journal(path,
+                  {'type': 'snapshot', 'running': {}, 'logs': []},
+                  {'type': 'start', 'cycle': "Cycle 1", 'session_id': "a", 'student': "Ana", 'start': 1.0},
+                  {'type': 'start', 'cycle': "Cycle 2", 'session_id': "b", 'student': "Ben", 'start': 2.0},
+                  {'type': 'energy', 'energy': {"Cycle 1": 50.0, "Cycle 2": 80.0}},
+                  {'type': 'stop', 'cycle': "Cycle 2", 'record': record("b", "Cycle 2", "Ben")})
+    state = SessionJournal(str(path)).replay()
+    assert state['running'] == {"Cycle 1": {'session_id': "a", 'student': "Ana", 'start': 1.0, 'energy_j': 50.0}}
+    assert [r['session_id'] for r in state['logs']] == ["b"]
+
+
+def test_clean_close_restores_nothing(tmp_path):
+    path = tmp_path / "sessions.journal"
+    write_journal(path,
+                  {'type': 'start', 'cycle': "Cycle 1", 'session_id': "a", 'student': "Ana", 'start': 1.0},
+                  {'type': 'closed'})
+    assert SessionJournal(str(path)).replay() == {'running': {}, 'logs': []}
+
+
+def test_torn_or_malformed_last_line_is_ignored(tmp_path):
+    path = tmp_path / "sessions.journal"
+    start = {'type': 'start', 'cycle': "Cycle 1", 'session_id': "a", 'student': "Ana", 'start': 1.0}
+    write_journal(path, start, '{"type": "stop", "cyc')
+    assert "Cycle 1" in SessionJournal(str(path)).replay()['running']
+    write_journal(path, start, {'type': 'stop', 'cycle': "Cycle 1"})   # no record
+    assert "Cycle 1" in SessionJournal(str(path)).replay()['running']
+    write_journal(path, start, {'cycle': "Cycle 1"})                   # no type
+    assert "Cycle 1" in SessionJournal(str(path)).replay()['running']
+
+
+def test_replayed_stops_are_stored_once(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    assert store.append_many([record("a"), record("b")]) == 2
+    # after a crash every journaled stop is queued again
+    assert store.append_many([record("a"), record("b"), record("c")]) == 1
+    assert len(store.sessions()) == 3
+    store.close()
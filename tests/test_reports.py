@@ -0,0 +1,65 @@
+# tests/test_reports.py
+import threading
+from datetime import datetime
+import pytest
+from reports import Cancelled, ReportJob, build_report
+from session_store import SessionStore
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    start = datetime(2026, 1, 5, 10).timestamp()
+    # 12000 sessions, 100 s apart: all in January
+    store.append_many([{'student': f"S{i % 40}", 'cycle': "Cycle 1", 'start': start + i * 100,
+                        'end': start + i * 100 + 60, 'duration': 60.0, 'avg_power': 20.0, 'kwh': 0.001,
+                        'session_id': str(i)} for i in range(12000)])
+    store.close()
+    return tmp_path
+
+
+def test_build_report_writes_every_session(history):
+    out = str(history / "students.xlsx")
+    n = build_report("students", out, str(history / "sessions.db"), str(history / "archive"),
+                     str(history / "config.xlsx"))
+    assert n == 12000
+    assert (history / "students.xlsx").exists()
+
+
+def test_cancelled_report_removes_its_partial_file(history):
+    cancel = threading.Event()
+    cancel.set()
+    out = history / "students.xlsx"
+    with pytest.raises(Cancelled):
+        build_report("students", str(out), str(history / "sessions.db"), str(history / "archive"),
+                     str(history / "config.xlsx"), cancel=cancel)
+    assert not out.exists()
+
+
+class CancelAfter:
+    """An Event that turns set after `n` checks."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def is_set(self):
+        self.n -= 1
+        return self.n < 0
+
+
+def test_cancel_within_a_month(history):
+    out = history / "students.xlsx"
+    cancel = CancelAfter(1)   # passes the check before the month, not the one inside it
+    with pytest.raises(Cancelled):
+        build_report("students", str(out), str(history / "sessions.db"), str(history / "archive"),
+                     str(history / "config.xlsx"), cancel=cancel)
+    assert not out.exists()
+
+
+def test_shutdown_removes_unfinished_reports(history):
+    job = ReportJob(out_dir=str(history / "reports"), store_path=str(history / "sessions.db"),
+                    archive_dir=str(history / "archive"), config_path=str(history / "config.xlsx"))
+    job.shutdown(timeout=0.0)   # before the workers are even up: they are terminated
+    assert not any(p.is_alive() for p in job.procs)
+    assert not any(status == 'done' for status, _ in job.results.values())
+    assert list((history / "reports").iterdir()) == []
@@ -0,0 +1,49 @@
+# tests/test_rollups.py
+from datetime import date
+from rollups import RollupIndex
+
+WED = date(2026, 3, 18)
+
+
+def index():
+    r = RollupIndex()
+    r.add("2026-03-18", "Ana", "Cycle 1", 0, 60, 60, 0.5)    # Wednesday
+    r.add("2026-03-16", "Ana", "Cycle 2", 0, 60, 60, 0.25)   # Monday
+    r.add("2026-03-16", "Ben", "Cycle 1", 0, 60, 60, 1.0)
+    r.add("2026-03-02", "Ben", "Cycle 1", 0, 60, 60, 2.0)
+    r.add("2026-02-27", "Cy", "Cycle 3", 0, 60, 60, 4.0)
+    return r
+
+
+def test_windows():
+    r = index()
+    assert r.totals("today", today=WED) == {"Ana": [0.5, 1]}
+    assert r.totals("week", today=WED) == {"Ana": [0.75, 2], "Ben": [1.0, 1]}
+    assert r.totals("month", today=WED) == {"Ana": [0.75, 2], "Ben": [3.0, 2]}
+    assert r.totals("all")["Cy"] == [4.0, 1]
+    assert r.totals("week", by="cycle", today=WED) == {"Cycle 1": [1.5, 2], "Cycle 2": [0.25, 1]}
+
+
+def test_top_ranks_by_energy():
+    assert [name for name, _, _ in index().top(window="all")] == ["Cy", "Ben", "Ana"]
+    assert index().top(1, window="month", today=WED) == [("Ben", 3.0, 2)]
+
+
+def test_cache_follows_the_date():
+    r = index()
+    assert r.totals("today", today=WED) == {"Ana": [0.5, 1]}
+    assert r.totals("today", today=date(2026, 3, 19)) == {}
+
+
+def test_add_invalidates_cache():
+    r = index()
+    r.totals("today", today=WED)
+    r.add("2026-03-18", "Ben", "Cycle 1", 0, 60, 60, 1.0)
+    assert r.totals("today", today=WED)["Ben"] == [1.0, 1]
+
+
+def test_archived_totals_count_only_all_time():
+    r = index()
+    r.add_totals({"Dee": [9.0, 3]}, {"Cycle 4": [9.0, 3]})
+    assert r.top(1) == [("Dee", 9.0, 3)]
+    assert "Dee" not in r.totals("month", today=WED)
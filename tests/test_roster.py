@@ -0,0 +1,35 @@
+# tests/test_roster.py
+from openpyxl import Workbook, load_workbook
+from roster import RosterStore, read_xlsx_classes, read_xlsx_names, save_roster
+
+
+def test_save_roster_keeps_other_columns_and_sheets(tmp_path):
+    path = str(tmp_path / "config.xlsx")
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Students"
+    ws.append(["ID", "Name", "Class", "Notes"])
+    ws.append([1, "Ana", "7B", "asthma"])
+    ws.append([2, "Ben", "7A", None])
+    wb.create_sheet("Bikes").append(["Cycle 1", "blue"])
+    wb.save(path)
+
+    save_roster(["Ben", "Cy"], path, str(tmp_path / "cache.json"))
+    assert read_xlsx_names(path) == ["Ben", "Cy"]
+    assert read_xlsx_classes(path) == {"Ben": "7A"}
+    wb = load_workbook(path)
+    assert wb.sheetnames == ["Students", "Bikes"]
+    assert [list(r) for r in wb["Students"].iter_rows(values_only=True)] == [
+        ["ID", "Name", "Class", "Notes"], [2, "Ben", "7A", None], [None, "Cy", None, None]]
+    assert list(wb["Bikes"].iter_rows(values_only=True)) == [("Cycle 1", "blue")]
+
+
+def test_compact_creates_a_missing_workbook(tmp_path):
+    store = RosterStore(str(tmp_path / "config.xlsx"), str(tmp_path / "cache.json"),
+                        str(tmp_path / "config.journal"))
+    store.load()
+    store.add("Ana")
+    store.compact()
+    assert read_xlsx_names(str(tmp_path / "config.xlsx")) == ["Ana"]
+    assert RosterStore(str(tmp_path / "config.xlsx"), str(tmp_path / "cache.json"),
+                       str(tmp_path / "config.journal")).load().names == ["Ana"]
@@ -0,0 +1,33 @@
+# tests/test_session_store.py
+from datetime import time
+import pandas as pd
+import pytest
+from session_store import SessionStore
+
+
+def write_log(path, sheets):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for day, rows in sheets.items():
+            pd.DataFrame(rows).to_excel(writer, sheet_name=day, index=False)
+
+
+def test_legacy_voltage_sums_are_not_imported_as_energy(tmp_path):
+    log = str(tmp_path / "log.xlsx")
+    write_log(log, {
+        # written by the original SessionTracker: "Energy (kWh)" is total voltage / 1000
+        "2025-06-02": [{"Student": "Ana", "Cycle": "Cycle 1", "Start": time(10, 0, 0), "End": time(10, 0, 33),
+                        "Duration (s)": 33.0, "Total Voltage": 106.79, "Energy (kWh)": 0.10679}],
+        # written by write_log_xlsx: real energy
+        "2025-06-03": [{"Student": "Ben", "Cycle": "Cycle 2", "Start": time(9, 0, 0), "End": time(9, 1, 0),
+                        "Duration (s)": 60.0, "Avg Power (W)": 30.0, "Energy (kWh)": 0.0005}],
+    })
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    assert store.import_legacy_xlsx(log) == 2
+    rows = {r[2]: r for r in store.sessions()}
+    assert rows["Ana"][8] == 0.0
+    assert rows["Ana"][7] is None
+    assert rows["Ben"][8] == pytest.approx(0.0005)
+    legacy = dict(store.conn.execute("SELECT student, legacy_energy FROM sessions"))
+    assert legacy == {"Ana": pytest.approx(0.10679), "Ben": None}
+    assert store.import_legacy_xlsx(log) == 0   # one-time
+    store.close()
@@ -0,0 +1,108 @@
+# tests/test_sync.py
+from datetime import date, datetime
+import pytest
+from archive import SessionArchive
+from session_store import SessionStore
+import sync
+
+
+def record(day, student="Ana", hour=10):
+    start = datetime.fromisoformat(f"{day} {hour:02d}:00:00").timestamp()
+    return {'student': student, 'cycle': "Cycle 1", 'start': start, 'end': start + 60,
+            'duration': 60.0, 'avg_power': 20.0, 'kwh': 0.001}
+
+
+@pytest.fixture
+def stores(tmp_path):
+    opened = []
+
+    def make(name):
+        store = SessionStore(str(tmp_path / f"{name}.db"))
+        opened.append(store)
+        return store
+    yield make
+    for store in opened:
+        store.close()
+
+
+def test_apply_delta_is_idempotent(stores):
+    a, c = stores("a"), stores("c")
+    a.append_many([record("2026-03-16", s) for s in ("Ana", "Ben", "Cy")])
+    payload = sync.delta(a, "A")
+    assert sync.apply_delta(c, payload) == 3
+    assert sync.apply_delta(c, payload) == 0
+    # even with the high-water mark lost, (station, seq) is unique
+    c.set_meta("synced:A", 0)
+    assert sync.apply_delta(c, payload) == 0
+    assert len(c.sessions()) == 3
+    assert c.local_sessions() == []
+
+
+def test_own_station_is_skipped(stores):
+    a = stores("a")
+    a.append_many([record("2026-03-16")])
+    assert sync.apply_delta(a, sync.delta(a, "A"), own_station="A") == 0
+
+
+def test_export_and_merge_through_directory(stores, tmp_path):
+    a, b, c = stores("a"), stores("b"), stores("c")
+    share = str(tmp_path / "share")
+    a.append_many([record("2026-03-16", "Ana")])
+    b.append_many([record("2026-03-16", "Ben"), record("2026-03-17", "Ben")])
+    assert sync.export(a, "A", share) == 1
+    assert sync.export(b, "B", share) == 2
+    assert sync.export(b, "B", share) == 0
+    assert sync.merge(c, share, "C") == {'A': 1, 'B': 2}
+    assert sync.merge(c, share, "C") == {}
+    # a merged station exports only what it recorded itself
+    assert sync.merge(a, share, "A") == {'B': 2}
+    assert sync.export(a, "A", share) == 0
+
+
+def test_merged_rows_before_the_archive_cutoff_go_to_the_archive(stores, tmp_path):
+    local, remote = stores("local"), stores("remote")
+    archive = SessionArchive(local, str(tmp_path / "archive"))
+    local.append_many([record("2026-01-05", "Ana"), record("2026-03-16", "Ana")])
+    assert archive.compact(keep_days=31, today=date(2026, 3, 18)) == 1
+    remote.append_many([record("2026-01-06", "Ben"), record("2026-03-17", "Ben")])
+
+    assert sync.apply_delta(local, sync.delta(remote, "B"), archive=archive) == 2
+    assert [r[2] for r in local.sessions()] == ["Ana", "Ben"]      # only days from the cutoff on
+    assert sorted(r[2] for r in archive.query(last_day="2026-01-31")) == ["Ana", "Ben"]
+    assert len(archive.query()) == 4
+
+
+def test_sessions_archived_before_export_are_still_exported(stores, tmp_path):
+    local, other = stores("local"), stores("other")
+    share = str(tmp_path / "share")
+    archive = SessionArchive(local, str(tmp_path / "archive"))
+    local.append_many([record("2026-01-05", "Ana"), record("2026-03-16", "Ben")])
+    assert archive.compact(keep_days=31, today=date(2026, 3, 18)) == 1
+    assert sync.export(local, "A", share, archive) == 2
+    assert sync.export(local, "A", share, archive) == 0
+    assert sync.merge(other, share, "O") == {'A': 2}
+    assert sorted(r[2] for r in other.sessions()) == ["Ana", "Ben"]
+    # the API delta reads the archive the same way
+    assert [r[2] for r in sync.delta(local, "A", archive=archive)['rows']] == ["Ana", "Ben"]
+    assert sync.delta(local, "A", 0, 1, archive)['rows'][0][2] == "Ana"
+
+
+def test_archive_keeps_origin_and_drops_reimported_sessions(stores, tmp_path):
+    local, remote = stores("local"), stores("remote")
+    archive = SessionArchive(local, str(tmp_path / "archive"))
+    local.append_many([record("2026-01-05", "Ana"), record("2026-03-16", "Ana")])
+    archive.compact(keep_days=31, today=date(2026, 3, 18))
+    remote.append_many([record("2026-01-06", "Ben")])
+    payload = sync.delta(remote, "B")
+    sync.apply_delta(local, payload, archive=archive)
+
+    cols = archive.load("2026-01")
+    assert sorted(zip(cols['student'].tolist(), cols['station'].tolist(), cols['station_seq'].tolist())) \
+        == [("Ana", "", 0), ("Ben", "B", payload['rows'][0][0])]
+    # merged sessions are not this station's to export
+    assert [r[2] for r in archive.local_sessions()] == ["Ana"]
+    # imported again (high-water mark lost): the archive still holds it once
+    local.set_meta("synced:B", 0)
+    sync.apply_delta(local, payload, archive=archive)
+    assert sorted(r[2] for r in archive.query(last_day="2026-01-31")) == ["Ana", "Ben"]
+    assert local.sessions(last_day="2026-01-31") == []
@@ -0,0 +1,70 @@
+# tests/test_telemetry.py
+import json
+import math
+import numpy as np
+import pytest
+from telemetry_recorder import TelemetryReader, TelemetryRecorder
+
+T0 = 1750000000.0   # mid-afternoon local time, far from midnight
+
+
+def frame(t, **voltages):
+    return {'timestamp': t, 'channels': [{'channel': ch, 'voltage': v} for ch, v in voltages.items()]}
+
+
+def record(tmp_path, frames, batch_frames=200):
+    rec = TelemetryRecorder(["C1", "C2"], directory=str(tmp_path), batch_frames=batch_frames)
+    rec.start()
+    for f in frames:
+        rec.record(f)
+    rec.close()
+    names = sorted(p.stem for p in tmp_path.glob("*.bin"))
+    assert len(names) == 1
+    return TelemetryReader(names[0], directory=str(tmp_path))
+
+
+def test_round_trip(tmp_path):
+    reader = record(tmp_path, [frame(T0, C1=12.5, C2=3.0), frame(T0 + 1, C1=13.0), frame(T0 + 2, C9=1.0)])
+    assert reader.channels == ["C1", "C2"]
+    assert reader.frames['t'].tolist() == [T0, T0 + 1, T0 + 2]
+    t, v = reader.channel("C1")
+    assert v[:2].tolist() == [12.5, 13.0]
+    assert math.isnan(reader.frames['v'][1, 1])   # missing channel
+    assert np.isnan(reader.frames['v'][2]).all()  # unknown channel ignored
+
+
+def test_between_is_inclusive_view(tmp_path):
+    reader = record(tmp_path, [frame(T0 + i, C1=float(i)) for i in range(10)])
+    part = reader.between(T0 + 2, T0 + 5)
+    assert part['t'].tolist() == [T0 + 2, T0 + 3, T0 + 4, T0 + 5]
+    assert np.shares_memory(part, reader.frames)
+    assert len(reader.between(T0 + 20, T0 + 30)) == 0
+    _, v = reader.channel("C1", T0 + 8, T0 + 100)
+    assert v.tolist() == [8.0, 9.0]
+
+
+def test_out_of_order_frames_are_found(tmp_path):
+    order = [0, 2, 1, 5, 3, 4, 9, 6, 8, 7]   # batches of 2: also late across batches
+    reader = record(tmp_path, [frame(T0 + i, C1=float(i)) for i in order], batch_frames=2)
+    with open(next(tmp_path.glob("*.json")), "r", encoding="utf-8") as f:
+        assert json.load(f)['sorted'] is False
+    assert reader.between(T0 + 3, T0 + 6)['v'][:, 0].tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert reader.between(T0, T0 + 9)['t'].tolist() == [T0 + i for i in range(10)]
+    assert reader.at(T0 + 6.5)['v'][0] == 7.0
+
+
+def test_in_order_batches_stay_sorted(tmp_path):
+    reader = record(tmp_path, [frame(T0 + i, C1=float(i)) for i in (1, 0, 3, 2)], batch_frames=2)
+    with open(next(tmp_path.glob("*.json")), "r", encoding="utf-8") as f:
+        assert json.load(f)['sorted'] is True
+    assert reader.frames['t'].tolist() == [T0, T0 + 1, T0 + 2, T0 + 3]
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    reader = record(tmp_path, [frame(T0, C1=1.0), frame(T0 + 1, C1=2.0)])
+    path = next(tmp_path.glob("*.bin"))
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+    reader = TelemetryReader(path.stem, directory=str(tmp_path))
+    assert len(reader.frames) == 2
+    assert reader.at(T0 + 5)['v'][0] == pytest.approx(2.0)
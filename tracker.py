@@ -1,93 +1,79 @@
 # tracker.py
-import os
 import time
-import pandas as pd
-from datetime import datetime
-from openpyxl import load_workbook
+import uuid
+from energy import J_PER_KWH
 
 class SessionTracker:
-    def __init__(self, cycle_id):
+    def __init__(self, cycle_id, engine, store):
         self.cycle_id = cycle_id
+        self.engine = engine          # energy.EnergyEngine holding this bike's totals
+        self.store = store            # where completed rides go: anything with append(record)
+        self.index = engine.index[cycle_id]
         self.running = False
         self.start_time = None
-        self.data = {}
         self.current_student = None
-        self.total_voltage = 0
+        self.session_id = None
+        self.start_energy_j = 0.0
 
     def start(self, student):
         """Begin tracking a new session for `student`."""
         self.running = True
+        self.session_id = uuid.uuid4().hex
         self.start_time = time.time()
         self.current_student = student
-        self.total_voltage = 0
+        self.start_energy_j = self.engine.energy_j[self.index]
 
-    def update_voltage(self, voltage):
-        if self.running:
-            self.total_voltage += voltage
-            self.data[self.cycle_id] = voltage
+    def restore(self, student, start_time, energy_j, session_id):
+        """Resume a session recovered from the journal after a crash."""
+        self.running = True
+        self.session_id = session_id
+        self.start_time = start_time
+        self.current_student = student
+        # the engine restarted from zero; offset so energy_j continues from energy_j
+        self.start_energy_j = self.engine.energy_j[self.index] - energy_j
 
-    def stop(self):
-        """End session, log it into log.xlsx under sheet named YYYY-MM-DD, then reset."""
+    @property
+    def energy_j(self):
+        """Energy generated since start(), in joules."""
         if not self.running:
-            return
+            return 0.0
+        return float(self.engine.energy_j[self.index] - self.start_energy_j)
 
-        # --- Build the DataFrame for this session ---
-        end_ts   = time.time()
-        start_dt = datetime.fromtimestamp(self.start_time)
-        end_dt   = datetime.fromtimestamp(end_ts)
-        date_str = start_dt.strftime("%Y-%m-%d")  # sheet name
+    @property
+    def energy_kwh(self):
+        return self.energy_j / J_PER_KWH
 
-        df = pd.DataFrame([{
-            "Student": self.current_student,
-            "Cycle": self.cycle_id,
-            "Start": start_dt.time(),
-            "End":   end_dt.time(),
-            "Duration (s)": end_dt.timestamp() - start_dt.timestamp(),
-            "Total Voltage": self.total_voltage,
-            "Energy (kWh)": self.total_voltage / 1000.0
-        }])
+    @property
+    def power(self):
+        """Latest instantaneous power, in watts."""
+        return float(self.engine.power[self.index])
 
-        log_path = "log.xlsx"
-        if os.path.exists(log_path):
-            # load existing workbook just to get existing sheet info
-            book = load_workbook(log_path)
-            if date_str in book.sheetnames:
-                ws = book[date_str]
-                startrow = ws.max_row
-                header   = False
-            else:
-                startrow = 0
-                header   = True
+    def stop(self):
+        """End the session, hand it to the store (or persistence queue) and reset.
+
+        Returns the completed session record (or None if nothing was running).
+        """
+        if not self.running:
+            return None
 
-            # append or create the date sheet
-            with pd.ExcelWriter(
-                log_path,
-                engine="openpyxl",
-                mode="a",
-                if_sheet_exists="overlay",
-                date_format="yyyy-mm-dd",
-                datetime_format="hh:mm:ss"
-            ) as writer:
-                df.to_excel(
-                    writer,
-                    sheet_name=date_str,
-                    index=False,
-                    header=header,
-                    startrow=startrow
-                )
-        else:
-            # first run: make brand-new file
-            with pd.ExcelWriter(
-                log_path,
-                engine="openpyxl",
-                mode="w",
-                date_format="yyyy-mm-dd",
-                datetime_format="hh:mm:ss"
-            ) as writer:
-                df.to_excel(writer, sheet_name=date_str, index=False)
+        end_ts = time.time()
+        duration = end_ts - self.start_time
+        energy_j = self.energy_j
+        record = {
+            'session_id': self.session_id,
+            'cycle': self.cycle_id,
+            'student': self.current_student,
+            'start': self.start_time,
+            'end': end_ts,
+            'duration': duration,
+            'avg_power': energy_j / duration if duration > 0 else 0.0,
+            'kwh': energy_j / J_PER_KWH,
+        }
+        self.store.append(record)
 
         # --- reset tracker state ---
         self.running = False
         self.current_student = None
-        self.data = {}
-        self.total_voltage = 0
+        self.session_id = None
+        self.start_energy_j = 0.0
+        return record
@@ -1,30 +1,41 @@
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton,
-    QHBoxLayout, QTableWidget, QTableWidgetItem, QAbstractItemView, QMessageBox,
+    QHBoxLayout, QTableView, QAbstractItemView, QMessageBox,
     QDialog, QListWidget, QLineEdit, QFormLayout, QGroupBox, QDialogButtonBox,
-    QStatusBar, QHeaderView, QInputDialog
+    QStatusBar, QHeaderView, QInputDialog, QCompleter, QProgressDialog
 )
-from PyQt5.QtCore import QTimer, Qt, QPropertyAnimation, QEasingCurve, QItemSelection, QItemSelectionModel
-from PyQt5.QtGui import QBrush, QColor, QPalette, QLinearGradient
-import pandas as pd
+from PyQt5.QtCore import (
+    QTimer, Qt, QPropertyAnimation, QEasingCurve, QItemSelection, QItemSelectionModel, QStringListModel
+)
+from PyQt5.QtGui import QColor, QPalette, QLinearGradient
 import time
-from datetime import datetime
-from wifi_listener import WifiPoller
-from PyQt5.QtCore import QThread
-from tracker import SessionTracker
-from leaderboard import Leaderboard
+from engine import TrackerEngine, SessionError
+from live_model import LiveSessionModel
+from power_chart import PowerChartPanel
+from roster import RosterStore
+from startup import STARTUP
+from metrics import REGISTRY
 
 class EnergyApp(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("🚴‍♂️ Bicycle Energy Tracker")
         self.resize(1280, 720)
-        self.poller_thread = QThread()
-        self.poller = WifiPoller()
-        self.poller.moveToThread(self.poller_thread)
-        self.poller_thread.started.connect(self.poller.run)
-        self.poller.data_received.connect(self.handle_new_data)
-        self.poller_thread.start()
+        # pollers, trackers, journal and persistence live in the headless engine
+        self.engine = TrackerEngine()
+        STARTUP.mark("engine")
+        self.settings = self.engine.settings
+        self.trackers = self.engine.trackers
+        if self.settings['api_port']:
+            try:
+                self.engine.serve_api(self.settings['api_port'], self.settings['api_host'])
+            except OSError as e:
+                print(f"[WARN] Engine API disabled: {e}")
+        self.engine.session_started.connect(self.on_session_started)
+        self.engine.session_stopped.connect(self.on_session_stopped)
+        self.engine.sessions_reset.connect(self.on_sessions_reset)
+        self.engine.synced.connect(self.on_synced)
+        self.engine.sessions_stored.connect(self.on_sessions_stored)
         # Fade-in animation
         self.setWindowOpacity(0)
         anim = QPropertyAnimation(self, b"windowOpacity", self)
@@ -44,9 +55,16 @@ class EnergyApp(QWidget):
         self.setPalette(pal)
 
         # Data
+        self.roster_store = RosterStore()
         self.students = self.load_students()
-        self.trackers = {f"Cycle {i+1}": SessionTracker(f"Cycle {i+1}") for i in range(8)}
-        self.session_logs = []
+        STARTUP.mark("roster")
+        self.leaderboard = None
+        self.report_job = None
+        self.frames_seen = 0
+        self.last_render = 0.0
+        self.frames_drawn = 0
+        self.frames_coalesced = 0
+        self.ui_time = REGISTRY.histogram("ui_update_seconds", "update_ui duration")
 
         # wifi json reader
 
@@ -54,28 +72,27 @@ class EnergyApp(QWidget):
         # UI
         self.setup_ui()
         self.update_ui()
-
-    def handle_new_data(self, data):
-        for ch in data['channels']:
-            name = ch['channel']
-            voltage = ch['voltage']
-            if name.startswith("C"):
-                index = int(name[1:]) - 1
-                if 0 <= index < 8:
-                    tracker_name = f"Cycle {index + 1}"
-                    self.trackers[tracker_name].update_voltage(voltage)
-
-        self.update_ui()
+        STARTUP.mark("widgets")
+        if self.engine.restored_msg:
+            self.status.showMessage(self.engine.restored_msg, 10000)
+
+    def render_frame(self):
+        now = time.monotonic()
+        # redraw when new telemetry arrived, and at least once a second for durations
+        new = self.engine.frames_in - self.frames_seen
+        if new > 1:
+            self.frames_coalesced += new - 1
+        if new or now - self.last_render >= 1.0:
+            self.update_ui()
 
     def load_students(self):
-        try:
-            df = pd.read_excel("config.xlsx")
-            return df['Name'].tolist()
-        except:
-            return []
+        """The roster as a RosterIndex (O(1) `in`, prefix/fuzzy search)."""
+        return self.roster_store.load()
 
-    def save_students(self):
-        pd.DataFrame({'Name': self.students}).to_excel("config.xlsx", index=False)
+    def complete_student(self, text):
+        # the index does the matching; the completer only shows the result
+        self.student_matches.setStringList(self.students.search(text))
+        self.student_completer.complete()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -88,7 +105,15 @@ class EnergyApp(QWidget):
         h = QHBoxLayout(grp)
         h.setSpacing(20)
         h.addWidget(QLabel("Select Student:"))
-        self.student_cb = QComboBox(); self.student_cb.addItems(self.students)
+        self.student_cb = QComboBox(); self.student_cb.addItems(self.students.names)
+        # type to search: prefix matches on any part of the name, then close spellings
+        self.student_cb.setEditable(True)
+        self.student_cb.setInsertPolicy(QComboBox.NoInsert)
+        self.student_matches = QStringListModel(self)
+        self.student_completer = QCompleter(self.student_matches, self)
+        self.student_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.student_cb.setCompleter(self.student_completer)
+        self.student_cb.lineEdit().textEdited.connect(self.complete_student)
         h.addWidget(self.student_cb)
         self.refresh_btn = QPushButton("Refresh")
         self.refresh_btn.setFixedHeight(30)
@@ -130,22 +155,24 @@ class EnergyApp(QWidget):
 
 
         # Table
-        self.live_table = QTableWidget(0,6)
-        self.live_table.setHorizontalHeaderLabels([
-            "Cycle","Student","Start","End","Duration","kWh"
-        ])
+        self.live_model = LiveSessionModel(self)
+        self.live_model.set_finished(self.engine.session_logs)
+        self.selected_ids = set()
+        self.live_table = QTableView()
+        self.live_table.setModel(self.live_model)
         self.live_table.setAlternatingRowColors(True)
         self.live_table.setStyleSheet(
-            "QTableWidget { font-size:15px; background: rgba(255,255,255,204); }"
+            "QTableView { font-size:15px; background: rgba(255,255,255,204); }"
             " QHeaderView::section { background: #004d40; color: white; padding:4px; }"
         )
         hdr = self.live_table.horizontalHeader()
-        for i in range(6): hdr.setSectionResizeMode(i, QHeaderView.Stretch)
-        self.live_table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.live_table.setSelectionMode(QAbstractItemView.MultiSelection)
-        self.live_table.cellClicked.connect(self.on_cell_clicked)
-        self.live_table.itemSelectionChanged.connect(self.on_table_selection)
+        for i in range(self.live_model.columnCount()): hdr.setSectionResizeMode(i, QHeaderView.Stretch)
+        self.live_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.live_table.selectionModel().selectionChanged.connect(self.on_table_selection)
         layout.addWidget(self.live_table)
+        # Live power curve per running bike
+        self.charts = PowerChartPanel(self.engine.history)
+        layout.addWidget(self.charts)
         # Selection info
         self.sel_label = QLabel("Selected: None"); self.sel_label.setStyleSheet("font-size:16px;color:#004d40;")
         layout.addWidget(self.sel_label)
@@ -154,8 +181,9 @@ class EnergyApp(QWidget):
         self.status = QStatusBar(); self.status.setStyleSheet("font-size:14px;background:#004d40;color:white;")
         layout.addWidget(self.status)
 
-        # Timer
-        self.timer = QTimer(self); self.timer.timeout.connect(self.update_ui); self.timer.start(1000)
+        # Timer: redraw at most ui_fps times a second, however fast telemetry arrives
+        self.timer = QTimer(self); self.timer.timeout.connect(self.render_frame)
+        self.timer.start(max(1, int(1000 / self.settings['ui_fps'])))
 
         # Triggers
         self.cycle_cb.currentTextChanged.connect(self.update_buttons)
@@ -163,49 +191,47 @@ class EnergyApp(QWidget):
         self.live_table.setSelectionMode(QAbstractItemView.NoSelection)
         self.live_table.setSelectionBehavior(QAbstractItemView.SelectItems)
 
-        self.live_table.cellClicked.connect(self.on_cell_clicked)
+        self.live_table.clicked.connect(self.on_cell_clicked)
         self.update_buttons()
 
     def refresh_students(self):
         self.students = self.load_students()
         self.student_cb.clear()
-        self.student_cb.addItems(self.students)
+        self.student_cb.addItems(self.students.names)
         self.status.showMessage("Student list refreshed", 3000)
 
-    def on_cell_clicked(self, row, col):
-        model = self.live_table.selectionModel()
-        table_model = self.live_table.model()
-
-        # Build the selection range for this row
-        first_index = table_model.index(row, 0)
-        last_index = table_model.index(row, self.live_table.columnCount() - 1)
-        selRange = QItemSelection(first_index, last_index)
-
-        # Check if this row is already selected
-        is_selected = all(model.isSelected(table_model.index(row, c))
-                          for c in range(self.live_table.columnCount()))
-
-        if is_selected:
-            model.select(selRange, QItemSelectionModel.Deselect | QItemSelectionModel.Rows)
+    def on_cell_clicked(self, index):
+        sid = self.live_model.session_id(index.row())
+        if sid in self.selected_ids:
+            self.selected_ids.discard(sid)
         else:
             # Clear previous selection and select this row
-            model.clearSelection()
-            model.select(selRange, QItemSelectionModel.Select | QItemSelectionModel.Rows)
+            self.selected_ids = {sid}
+        self.apply_selection()
+
+    def apply_selection(self):
+        """Select the rows whose session IDs are in self.selected_ids."""
+        sel = QItemSelection()
+        last_col = self.live_model.columnCount() - 1
+        for sid in self.selected_ids:
+            row = self.live_model.row_for(sid)
+            if row is not None:
+                sel.select(self.live_model.index(row, 0), self.live_model.index(row, last_col))
+        self.live_table.selectionModel().select(sel, QItemSelectionModel.ClearAndSelect)
 
     def on_table_selection(self):
-        rows = sorted(set(idx.row() for idx in self.live_table.selectedIndexes()))
+        rows = sorted(idx.row() for idx in self.live_table.selectionModel().selectedRows())
         if not rows:
             self.sel_label.setText("Selected: None")
             return
         info = []
         for r in rows:
-            c = self.live_table.item(r, 0).text()
-            s = self.live_table.item(r, 1).text()
+            c, s = self.live_model.cells(r)[:2]
             info.append(f"{c}:{s}")
         self.sel_label.setText("Selected: " + ", ".join(info))
-        last = rows[-1]
-        self.cycle_cb.setCurrentText(self.live_table.item(last, 0).text())
-        self.student_cb.setCurrentText(self.live_table.item(last, 1).text())
+        c, s = self.live_model.cells(rows[-1])[:2]
+        self.cycle_cb.setCurrentText(c)
+        self.student_cb.setCurrentText(s)
 
     def animate_button(self, btn):
         anim = QPropertyAnimation(btn, b"geometry", self)
@@ -217,99 +243,160 @@ class EnergyApp(QWidget):
         anim.setEasingCurve(QEasingCurve.InOutQuad)
         anim.start()
 
-    def update_all_trackers(self, data):
-        for cyc, tr in self.trackers.items():
-            if cyc in data:
-                tr.update_voltage(data)
-
     def update_buttons(self):
         cyc = self.cycle_cb.currentText()
         run = self.trackers[cyc].running
         self.start_btn.setEnabled(not run)
         self.stop_btn.setEnabled(run)
 
+    def metrics_summary(self):
+        rtt = [h.quantile(0.95) for h in REGISTRY.family("poll_rtt_seconds").values() if h.count]
+        errors = REGISTRY.family("poll_errors_total")
+        timeouts = sum(c.value for labels, c in errors.items() if ("kind", "timeout") in labels)
+        bad = sum(c.value for labels, c in errors.items() if ("kind", "timeout") not in labels)
+        bad += sum(c.value for c in REGISTRY.family("frame_errors_total").values())
+        gap = self.engine.sample_gap.quantile(0.95)
+        ui = self.ui_time.quantile(0.95)
+        return (
+            (f" RTT p95 {max(rtt) * 1000:.0f} ms;" if rtt else "")
+            + f" Timeouts: {timeouts:.0f}; Errors: {bad:.0f};"
+            + (f" Gap p95 {gap * 1000:.0f} ms;" if gap is not None else "")
+            + (f" UI p95 {ui * 1000:.1f} ms" if ui is not None else "")
+        )
+
     def update_ui(self):
-        preserved = [
-            (self.live_table.item(r, 0).text(), self.live_table.item(r, 1).text())
-            for r in set(idx.row() for idx in self.live_table.selectedIndexes())
-        ]
-        self.live_table.setRowCount(0)
-        for log in self.session_logs:
-            r = self.live_table.rowCount()
-            self.live_table.insertRow(r)
-            vals = [
-                log['cycle'], log['student'],
-                datetime.fromtimestamp(log['start']).strftime('%H:%M:%S'),
-                datetime.fromtimestamp(log['end']).strftime('%H:%M:%S'),
-                f"{int(log['duration'])}s", f"{log['kwh']:.3f}"
-            ]
-            for i, v in enumerate(vals):
-                self.live_table.setItem(r, i, QTableWidgetItem(v))
-        for cyc, tr in self.trackers.items():
-            if tr.running:
-                r = self.live_table.rowCount()
-                self.live_table.insertRow(r)
-                vals = [
-                    cyc, tr.current_student,
-                    datetime.fromtimestamp(tr.start_time).strftime('%H:%M:%S'),
-                    "", f"{int(time.time() - tr.start_time)}s", f"{tr.total_voltage/1000:.3f}"
-                ]
-                for i, v in enumerate(vals):
-                    it = QTableWidgetItem(v)
-                    it.setBackground(QBrush(QColor(255,255,200)))
-                    self.live_table.setItem(r, i, it)
-        for row in range(self.live_table.rowCount()):
-            key = (
-                self.live_table.item(row, 0).text(),
-                self.live_table.item(row, 1).text()
-            )
-            if key in preserved:
-                self.live_table.selectRow(row)
+        t0 = time.perf_counter()
+        self.frames_seen = self.engine.frames_in
+        self.last_render = time.monotonic()
+        self.frames_drawn += 1
+        self.live_model.update_active(self.trackers)
+        self.charts.refresh(self.trackers)
         act = sum(1 for t in self.trackers.values() if t.running)
-        lg = len(self.session_logs)
-        self.status.showMessage(f"Active: {act}; Logged: {lg}")
+        lg = len(self.engine.session_logs)
+        ps = self.engine.persistence.stats()
+        self.status.showMessage(
+            f"Active: {act}; Logged: {lg}; Save queue: {ps['queue_depth']}"
+            f" (last flush {ps['last_flush_ms']:.0f} ms);"
+            f" Frames: {self.frames_seen} in, {self.frames_drawn} drawn, {self.frames_coalesced} coalesced;"
+            + self.metrics_summary()
+        )
         self.update_buttons()
+        self.ui_time.observe(time.perf_counter() - t0)
 
     def start_session(self):
         stu = self.student_cb.currentText()
-        cyc = self.cycle_cb.currentText()
-        if not stu:
-            QMessageBox.critical(self, "Error", "Select a student")
-            return
-        if self.trackers[cyc].running:
-            QMessageBox.critical(self, "Error", f"{cyc} already running")
+        if stu and stu not in self.students:
+            QMessageBox.critical(self, "Error", f"{stu} is not on the student list")
             return
-        if any(t.running and t.current_student == stu for t in self.trackers.values()):
-            QMessageBox.critical(self, "Error", f"{stu} already cycling")
-            return
-        self.trackers[cyc].start(stu)
-        self.update_ui()
+        try:
+            self.engine.start_session(self.cycle_cb.currentText(), stu)
+        except SessionError as e:
+            QMessageBox.critical(self, "Error", str(e))
 
     def stop_session(self):
-        cyc = self.cycle_cb.currentText()
-        tr = self.trackers[cyc]
-        if not tr.running:
-            return
-        et = time.time()
-        self.session_logs.append({
-            'cycle': cyc,
-            'student': tr.current_student,
-            'start': tr.start_time,
-            'end': et,
-            'duration': et - tr.start_time,
-            'kwh': tr.total_voltage / 1000.0
-        })
-        tr.stop()
-        self.update_ui()
+        self.engine.stop_session(self.cycle_cb.currentText())
 
     def reset_all_sessions(self):
-        for t in self.trackers.values():
-            t.stop()
-        self.session_logs.clear()
+        self.engine.reset_all_sessions()
+
+    # Engine signals: sessions may also be started/stopped through the API.
+    def on_session_started(self, live):
+        self.update_ui()
+
+    def on_session_stopped(self, record):
+        self.live_model.add_finished(record)
+        if record['session_id'] in self.selected_ids:
+            self.apply_selection()  # the row moved from the running block
         self.update_ui()
 
+    def on_sessions_reset(self):
+        self.live_model.set_finished(self.engine.session_logs)
+        self.selected_ids.clear()
+        self.update_ui()
+
+    def on_sessions_stored(self, n):
+        # keep the rollups current as rides complete (once the leaderboard has been opened)
+        if self.leaderboard is None:
+            return
+        if self.leaderboard.isVisible():
+            self.leaderboard.load_data()
+        else:
+            self.leaderboard.data.refresh()
+
+    def on_synced(self, result):
+        exported, added = result
+        imported = sum(added.values())
+        if not (exported or imported):
+            return
+        self.status.showMessage(f"Synced: {exported} session(s) sent, {imported} received "
+                                f"from {len(added)} other station(s)", 5000)
+        if imported and self.leaderboard is not None and self.leaderboard.isVisible():
+            self.leaderboard.load_data()   # the combined ranking
+
+    def closeEvent(self, event):
+        if self.report_job is not None and not self.report_job.done:
+            self.report_timer.stop()
+            # the workers die with us; don't leave half-written files. They check
+            # for cancel often, so this rarely waits the whole second.
+            self.report_job.shutdown(timeout=1.0)
+        self.engine.close()
+        self.roster_store.compact()
+        super().closeEvent(event)
+
     def show_leaderboard(self):
-        Leaderboard().show()
+        if self.leaderboard is None:
+            # imported on first use: keeps the leaderboard stack off the startup path
+            from leaderboard import Leaderboard
+            from leaderboard_data import LeaderboardData
+            self.leaderboard = Leaderboard(LeaderboardData(self.engine.store, self.engine.archive))
+        self.leaderboard.show()
+
+    def export_log(self):
+        try:
+            # the live log keeps the recent days; older ones are in archive/
+            n = self.engine.archive.export_xlsx("log.xlsx", first_day=self.engine.archive.cutoff)
+        except PermissionError:
+            QMessageBox.critical(self, "Export failed", "log.xlsx is open in another program")
+            return
+        self.status.showMessage(f"Exported {n} day(s) to log.xlsx", 5000)
+
+    def export_reports(self):
+        if self.report_job is not None and not self.report_job.done:
+            self.report_progress.show()
+            return
+        from reports import ReportJob
+        self.report_job = ReportJob()
+        self.report_progress = QProgressDialog("Exporting student and class reports...", "Cancel", 0, 100, self)
+        self.report_progress.setWindowTitle("Reports")
+        self.report_progress.setWindowModality(Qt.NonModal)
+        self.report_progress.setAutoReset(False)
+        self.report_progress.setAutoClose(False)
+        self.report_progress.canceled.connect(self.report_job.cancel)
+        self.report_progress.show()
+        self.report_timer = QTimer(self)
+        self.report_timer.timeout.connect(self.poll_reports)
+        self.report_timer.start(200)
+
+    def poll_reports(self):
+        # the reports are built in worker processes; this only reads their progress
+        job = self.report_job
+        fraction = job.poll()
+        if not job.done:
+            self.report_progress.setValue(int(fraction * 100))
+            return
+        self.report_timer.stop()
+        self.report_progress.canceled.disconnect()  # closing the dialog emits canceled
+        self.report_progress.close()
+        lines = []
+        for kind, (status, detail) in job.results.items():
+            if status == 'done':
+                lines.append(f"{kind}: {detail} session(s) -> {job.paths[kind]}")
+            else:
+                lines.append(f"{kind}: {status}" + (f" ({detail})" if detail else ""))
+        if any(status == 'error' for status, _ in job.results.values()):
+            QMessageBox.warning(self, "Reports", "\n".join(lines))
+        elif not job.cancel_event.is_set():
+            QMessageBox.information(self, "Reports", "\n".join(lines))
 
     def open_settings(self):
         text, ok = QInputDialog.getText(
@@ -324,20 +411,18 @@ class EnergyApp(QWidget):
         sg = QGroupBox("Student List")
         sl = QVBoxLayout()
         lst = QListWidget()
-        lst.addItems(self.students)
+        lst.addItems(self.students.names)
         sl.addWidget(lst)
+        # edits are journaled one line each; config.xlsx is rewritten on compaction
         def add():
             t, ok = QInputDialog.getText(d, "Add Student", "Name:")
-            if ok and t and t not in self.students:
-                self.students.append(t)
+            if ok and t and self.roster_store.add(t):
                 lst.addItem(t)
-                self.save_students()
         def rem():
             i = lst.currentRow()
             if i >= 0:
-                self.students.pop(i)
+                self.roster_store.remove(lst.item(i).text())
                 lst.takeItem(i)
-                self.save_students()
         hb = QHBoxLayout()
         pb = QPushButton("Add")
         rb = QPushButton("Remove")
@@ -355,6 +440,16 @@ class EnergyApp(QWidget):
         serf.addRow("IP:", pi)
         serf.addRow("Port:", bi)
         l.addWidget(serg)
+        xb = QPushButton("Export log.xlsx")
+        xb.clicked.connect(self.export_log)
+        l.addWidget(xb)
+        rpb = QPushButton("Export term reports")
+        rpb.clicked.connect(self.export_reports)
+        l.addWidget(rpb)
+        syb = QPushButton("Sync stations now")
+        syb.setEnabled(self.engine.sync is not None)   # needs sync_dir in settings.json
+        syb.clicked.connect(self.engine.start_sync)
+        l.addWidget(syb)
         bb = QDialogButtonBox(QDialogButtonBox.Ok)
         bb.accepted.connect(lambda: d.accept())
         l.addWidget(bb)
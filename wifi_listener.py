@@ -1,26 +1,203 @@
 # wifi_listener.py
 from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
 import requests
 import time
+from metrics import REGISTRY
+
+
+def next_slot(next_tick, now, period):
+    """Advance a fixed-rate schedule by one period, skipping slots we overran."""
+    next_tick += period
+    if next_tick <= now:
+        # Overran the slot: skip the missed ticks instead of bursting to
+        # catch up, but stay on the same grid.
+        missed = int((now - next_tick) // period) + 1
+        next_tick += missed * period
+    return next_tick
+
+
+def backoff_delay(period, failures, backoff_max):
+    """Exponential back-off while a board is unreachable."""
+    return min(backoff_max, period * (2 ** min(failures, 16)))
+
+
+def count_poll_error(board_id, e):
+    if isinstance(e, requests.Timeout):
+        kind = "timeout"
+    elif isinstance(e, requests.HTTPError):
+        kind = "http"
+    elif isinstance(e, ValueError):
+        kind = "parse"
+    else:
+        kind = "connection"
+    REGISTRY.counter("poll_errors_total", "Failed board polls by cause",
+                     board=board_id, kind=kind).inc()
+
+
+def board_json(response):
+    """The board's JSON reply, which must be an object; ValueError otherwise."""
+    data = response.json()
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object from the board, got {type(data).__name__}")
+    return data
 
 
 class WifiPoller(QObject):
+    """Polls one ESP board over a persistent HTTP connection at a fixed rate.
+
+    Every emitted frame carries a `timestamp` (time.time() at receive) next to
+    the board's own `channels` list.
+    """
     data_received = pyqtSignal(dict)
 
-    def __init__(self, parent=None):
+    def __init__(self, url="http://192.168.4.1/", rate_hz=10.0, timeout=0.5,
+                 backoff_max=5.0, board_id="B1", parent=None):
         super().__init__(parent)
+        self.url = url
+        self.board_id = board_id
+        self.period = 1.0 / max(rate_hz, 0.1)
+        self.timeout = timeout
+        self.backoff_max = backoff_max
         self._running = True
+        self._wake = threading.Event()
 
     def stop(self):
         self._running = False
+        self._wake.set()
 
     def run(self):
-        while self._running:
-            try:
-                response = requests.get("http://192.168.4.1/", timeout=2)
-                if response.status_code == 200:
-                    json_data = response.json()
+        session = requests.Session()  # keep-alive: one TCP connection for all samples
+        rtt = REGISTRY.histogram("poll_rtt_seconds", "HTTP round-trip time per board", board=self.board_id)
+        next_tick = time.monotonic()
+        failures = 0
+        try:
+            while self._running:
+                try:
+                    sent = time.perf_counter()
+                    response = session.get(self.url, timeout=self.timeout)
+                    received = time.time()
+                    rtt.observe(time.perf_counter() - sent)
+                    response.raise_for_status()
+                    json_data = board_json(response)
+                    json_data['timestamp'] = received
                     self.data_received.emit(json_data)
-            except Exception as e:
-                print(f"Error: {e}")
-            time.sleep(1)
+                    if failures:
+                        print(f"Board {self.url} back after {failures} failed polls")
+                    failures = 0
+                except (requests.RequestException, ValueError) as e:
+                    count_poll_error(self.board_id, e)
+                    if failures == 0:
+                        print(f"Error: {e}")
+                    failures += 1
+
+                now = time.monotonic()
+                if failures:
+                    # The first good response drops straight back to the fixed rate.
+                    next_tick = now + backoff_delay(self.period, failures, self.backoff_max)
+                else:
+                    next_tick = next_slot(next_tick, now, self.period)
+                self._wake.wait(max(0.0, next_tick - time.monotonic()))
+        finally:
+            session.close()
+
+
+class _Board:
+    """Per-board connection and back-off state for MultiBoardPoller."""
+
+    def __init__(self, board_id, url):
+        self.id = board_id
+        self.url = url
+        self.session = requests.Session()
+        self.rtt = REGISTRY.histogram("poll_rtt_seconds", "HTTP round-trip time per board", board=board_id)
+        self.future = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class MultiBoardPoller(QObject):
+    """Polls several ESP boards concurrently and merges them once per tick.
+
+    Each board gets its own keep-alive session and at most one request in
+    flight on a shared thread pool. At every tick the frames that have
+    arrived are merged into one snapshot; a board whose request is still
+    pending is simply left out of that tick, so a slow or dead board never
+    holds the others back. Channel names are namespaced by board ("B2:C3")
+    and each channel keeps its own board's receive `timestamp`.
+    """
+    data_received = pyqtSignal(dict)
+
+    def __init__(self, boards, rate_hz=10.0, timeout=0.5, backoff_max=5.0, parent=None):
+        super().__init__(parent)
+        self.boards = [_Board(b['id'], b['url']) for b in boards]
+        self.period = 1.0 / max(rate_hz, 0.1)
+        self.timeout = timeout
+        self.backoff_max = backoff_max
+        self._running = True
+        self._wake = threading.Event()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def _fetch(self, board):
+        sent = time.perf_counter()
+        response = board.session.get(board.url, timeout=self.timeout)
+        received = time.time()
+        board.rtt.observe(time.perf_counter() - sent)
+        response.raise_for_status()
+        return received, board_json(response)
+
+    def _collect(self, board, snapshot):
+        try:
+            received, json_data = board.future.result()
+        except (requests.RequestException, ValueError) as e:
+            count_poll_error(board.id, e)
+            if board.failures == 0:
+                print(f"Error ({board.id}): {e}")
+            board.failures += 1
+            board.retry_at = time.monotonic() + backoff_delay(
+                self.period, board.failures, self.backoff_max)
+            return
+        finally:
+            board.future = None
+        if board.failures:
+            print(f"Board {board.id} back after {board.failures} failed polls")
+        board.failures = 0
+        snapshot['boards'][board.id] = received
+        for ch in json_data.get('channels', []):
+            snapshot['channels'].append({
+                'channel': f"{board.id}:{ch['channel']}",
+                'voltage': ch['voltage'],
+                'timestamp': received,
+            })
+
+    def run(self):
+        pool = ThreadPoolExecutor(max_workers=len(self.boards), thread_name_prefix="board")
+        next_tick = time.monotonic()
+        try:
+            while self._running:
+                now = time.monotonic()
+                for board in self.boards:
+                    if board.future is None and now >= board.retry_at:
+                        board.future = pool.submit(self._fetch, board)
+
+                pending = [b.future for b in self.boards if b.future is not None]
+                deadline = next_slot(next_tick, now, self.period)
+                if pending:
+                    wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+
+                snapshot = {'timestamp': time.time(), 'channels': [], 'boards': {}}
+                for board in self.boards:
+                    if board.future is not None and board.future.done():
+                        self._collect(board, snapshot)
+                if snapshot['channels']:
+                    self.data_received.emit(snapshot)
+
+                next_tick = deadline
+                self._wake.wait(max(0.0, next_tick - time.monotonic()))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            for board in self.boards:
+                board.session.close()